@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+import fcntl
+import os
+from contextlib import contextmanager
+from datetime import datetime
+
+# 출력 파일 게시 방식
+#   FS_with_price.csv -> .versions/FS_with_price.20240917T120000_000000.1234.csv
+# 각 단계는 새 버전 파일에 쓰고 fsync 한 뒤 심볼릭 링크("current" 포인터)를 원자적으로 교체합니다.
+# 읽는 쪽은 잠금 없이 원래 경로를 열면 항상 완성된 버전 하나를 읽게 됩니다.
+# 같은 파일을 읽고 고쳐 쓰는 단계는 읽은 버전을 expected로 넘기면, 그 사이 다른 쪽이 게시한 경우
+# 덮어쓰지 않고 PublishConflictError를 냅니다 (포인터 확인과 교체는 잠금 안에서 함께 수행).
+# 읽는 동안 버전 파일을 여러 번 다시 여는 단계는 pin_version()으로 그 버전이 정리되지 않게 고정합니다.
+
+VERSIONS_DIR = '.versions'
+DEFAULT_KEEP = 3
+
+class PublishConflictError(Exception):
+    """읽은 뒤 다른 쪽이 새 버전을 게시해 교체를 포기한 경우."""
+
+def versions_dir(path):
+    return os.path.join(os.path.dirname(os.path.abspath(path)), VERSIONS_DIR)
+
+def version_prefix(path):
+    name, _ = os.path.splitext(os.path.basename(path))
+    return name + '.'
+
+def new_version_path(path):
+    name, ext = os.path.splitext(os.path.basename(path))
+    stamp = datetime.now().strftime('%Y%m%dT%H%M%S_%f')
+    return os.path.join(versions_dir(path), f"{name}.{stamp}.{os.getpid()}{ext}")
+
+def current_version(path):
+    """현재 게시된 버전 파일 경로를 반환합니다. 한 번 해석한 경로는 이후 교체와 무관하게 같은 내용을 가리킵니다."""
+    return os.path.realpath(path)
+
+def _fsync_dir(directory):
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def _swap_pointer(path, target):
+    # 임시 링크를 만든 뒤 os.replace로 교체하면 읽는 쪽은 이전 또는 새 버전만 보게 됩니다
+    link_tmp = f"{path}.{os.getpid()}.link"
+    os.symlink(os.path.relpath(target, os.path.dirname(os.path.abspath(path))), link_tmp)
+    os.replace(link_tmp, path)
+    _fsync_dir(os.path.dirname(os.path.abspath(path)))
+
+@contextmanager
+def _pointer_lock(path):
+    lock_path = os.path.join(versions_dir(path), f".{os.path.basename(path)}.lock")
+    with open(lock_path, 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+def pin_prefix(path):
+    return f".{os.path.basename(path)}.pin."
+
+def _pinned_versions(path):
+    # 고정한 프로세스는 핀 파일에 공유 잠금을 쥐고 있으므로, 배타 잠금을 얻을 수 있는 핀 파일은 남은 찌꺼기입니다
+    directory = versions_dir(path)
+    pinned = set()
+    for name in os.listdir(directory):
+        if not name.startswith(pin_prefix(path)):
+            continue
+        pin = os.path.join(directory, name)
+        try:
+            with open(pin, 'r') as f:
+                try:
+                    fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    pinned.add(os.path.join(directory, f.read().strip()))
+                    continue
+            os.remove(pin)
+        except FileNotFoundError:
+            pass
+    return pinned
+
+def collect_garbage(path, keep=DEFAULT_KEEP):
+    """현재 버전, 완성본 표시 버전, 고정된 버전을 제외하고 가장 최근 keep개의 이전 버전만 남깁니다."""
+    directory = versions_dir(path)
+    if not os.path.isdir(directory):
+        return
+    with _pointer_lock(path):
+        protected = {current_version(path), os.path.realpath(released_version(path) or path)}
+        protected |= {os.path.realpath(p) for p in _pinned_versions(path)}
+        prefix = version_prefix(path)
+        candidates = [os.path.join(directory, name) for name in os.listdir(directory) if name.startswith(prefix)]
+        candidates = [p for p in candidates if os.path.realpath(p) not in protected]
+        candidates.sort(reverse=True)  # 파일 이름의 타임스탬프 순
+        for old in candidates[keep:]:
+            try:
+                os.remove(old)
+            except FileNotFoundError:
+                pass
+
+@contextmanager
+def pin_version(path):
+    """현재 게시된 버전을 블록이 끝날 때까지 collect_garbage()가 지우지 않도록 고정하고 그 경로를 돌려줍니다.
+    돌려준 경로는 expected로 넘겨 충돌 검사에도 씁니다."""
+    os.makedirs(versions_dir(path), exist_ok=True)
+    stamp = datetime.now().strftime('%Y%m%dT%H%M%S_%f')
+    pin = os.path.join(versions_dir(path), f"{pin_prefix(path)}{os.getpid()}.{stamp}")
+    with _pointer_lock(path):
+        version = current_version(path)
+        f = open(pin, 'w')
+        fcntl.flock(f, fcntl.LOCK_SH)
+        f.write(os.path.basename(version))
+        f.flush()
+    try:
+        yield version
+    finally:
+        os.remove(pin)
+        f.close()
+
+@contextmanager
+def publish_file(path, keep=DEFAULT_KEEP, mode='w', newline='', expected=None):
+    """새 버전 파일을 열어 돌려주고, 블록이 성공적으로 끝나면 fsync 후 포인터를 교체합니다.
+    expected(current_version()으로 얻은 읽은 버전)를 주면 게시 시점의 버전이 다를 때 PublishConflictError를 냅니다."""
+    os.makedirs(versions_dir(path), exist_ok=True)
+    version_path = new_version_path(path)
+    kwargs = {} if 'b' in mode else {'newline': newline}
+    try:
+        with open(version_path, mode, **kwargs) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+    except BaseException:
+        if os.path.exists(version_path):
+            os.remove(version_path)
+        raise
+    with _pointer_lock(path):
+        if expected is not None and current_version(path) != expected:
+            os.remove(version_path)
+            raise PublishConflictError(f"{path} was republished after {os.path.basename(expected)} was read")
+        _swap_pointer(path, version_path)
+    collect_garbage(path, keep)
+
+def release_path(path):
+    return os.path.join(os.path.dirname(os.path.abspath(path)), f".{os.path.basename(path)}.release")
+
+def mark_release(path):
+    """현재 게시된 버전을 배치 파이프라인의 완성본으로 표시합니다.
+    같은 파일을 여러 단계가 차례로 다시 쓰는 경우, 읽는 쪽은 released_version()으로 중간 결과를 건너뛸 수 있습니다."""
+    marker = release_path(path)
+    tmp_path = f"{marker}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(os.path.basename(current_version(path)))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, marker)
+
+def released_version(path):
+    """mark_release()로 표시된 버전 파일 경로를 반환합니다. 표시된 적이 없으면 None입니다."""
+    marker = release_path(path)
+    if not os.path.exists(marker):
+        return None
+    with open(marker, 'r') as f:
+        return os.path.join(versions_dir(path), f.read().strip())
+
+def publish_csv(df, path, keep=DEFAULT_KEEP, expected=None):
+    with publish_file(path, keep, expected=expected) as f:
+        df.to_csv(f, index=False)
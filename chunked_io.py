@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+import numpy as np
+import pandas as pd
+
+from atomic_publish import publish_file
+
+# 대용량 유니버스를 위한 청크 단위 처리
+# 입력 CSV는 심볼별로 연속된 행으로 정렬되어 있다고 가정합니다 (수집/병합 단계의 출력 형식).
+# 한 심볼이 두 청크에 걸치지 않도록 마지막 심볼의 행은 다음 청크로 넘깁니다.
+
+DEFAULT_MEMORY_BUDGET_MB = 512
+# 읽은 데이터 대비 단계 처리 중 생기는 중간 결과 크기의 대략적인 배수
+PROCESSING_OVERHEAD = 4
+SAMPLE_ROWS = 1000
+
+def rows_for_budget(file_path, memory_budget_mb, **read_csv_kwargs):
+    """샘플 행의 메모리 사용량으로 예산 안에 들어가는 청크 행 수를 추정합니다."""
+    sample = pd.read_csv(file_path, nrows=SAMPLE_ROWS, **read_csv_kwargs)
+    if sample.empty:
+        return SAMPLE_ROWS
+    bytes_per_row = sample.memory_usage(deep=True).sum() / len(sample)
+    return max(SAMPLE_ROWS, int(memory_budget_mb * 1024 * 1024 / (bytes_per_row * PROCESSING_OVERHEAD)))
+
+def _widen(current, new):
+    if current is None or current == new:
+        return new
+    if np.issubdtype(current, np.number) and np.issubdtype(new, np.number) \
+            and not np.issubdtype(current, np.bool_) and not np.issubdtype(new, np.bool_):
+        return np.promote_types(current, new)
+    return np.dtype(object)
+
+def scan_dtypes(file_path, chunksize, **read_csv_kwargs):
+    """전체 파일을 한 번에 읽었을 때와 같은 컬럼 타입이 되도록 청크별 추론 결과를 합칩니다.
+    (예: 어떤 청크에서만 NaN이 있는 정수 컬럼은 전체를 float로 읽어야 출력 형식이 같아집니다)"""
+    dtypes = {}
+    for chunk in pd.read_csv(file_path, chunksize=chunksize, **read_csv_kwargs):
+        for col, dtype in chunk.dtypes.items():
+            dtypes[col] = _widen(dtypes.get(col), dtype)
+    return {col: ('object' if dtype == np.dtype(object) else dtype) for col, dtype in dtypes.items()}
+
+def iter_symbol_chunks(file_path, memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB, symbol_column='symbol', **read_csv_kwargs):
+    """심볼 경계에 맞춘 DataFrame 청크를 디스크에서 순서대로 읽어 돌려줍니다. 인덱스는 전체 파일 기준 행 번호입니다."""
+    chunksize = rows_for_budget(file_path, memory_budget_mb, **read_csv_kwargs)
+    dtypes = scan_dtypes(file_path, chunksize, **read_csv_kwargs)
+    read_csv_kwargs = dict(read_csv_kwargs, dtype=dtypes)
+
+    carry = None
+    for chunk in pd.read_csv(file_path, chunksize=chunksize, **read_csv_kwargs):
+        if carry is not None:
+            chunk = pd.concat([carry, chunk])
+        symbols = chunk[symbol_column].to_numpy()
+        # 마지막 심볼이 시작되는 위치를 찾아 그 앞까지만 내보냅니다
+        boundary = len(symbols)
+        while boundary > 0 and symbols[boundary - 1] == symbols[-1]:
+            boundary -= 1
+        if boundary == 0:
+            carry = chunk
+            continue
+        yield chunk.iloc[:boundary].copy()
+        carry = chunk.iloc[boundary:]
+    if carry is not None and not carry.empty:
+        yield carry.copy()
+
+def publish_csv_chunks(chunks, path, expected=None):
+    """청크 결과를 하나의 CSV로 이어 쓰고 atomic_publish로 게시합니다. 쓴 행 수를 반환합니다."""
+    rows = 0
+    with publish_file(path, expected=expected) as f:
+        for i, chunk in enumerate(chunks):
+            chunk.to_csv(f, index=False, header=(i == 0))
+            rows += len(chunk)
+    return rows
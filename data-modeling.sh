@@ -6,6 +6,13 @@ SCRIPT_DIR="/path/to/your/project"
 # 로그 파일 설정
 LOG_FILE="$SCRIPT_DIR/data-modeling.log"
 
+# PROFILE=1(또는 cpu) / PROFILE=mem 이면 단계별 프로파일 보고서를 profiles/ 아래에 남깁니다
+case "${PROFILE:-0}" in
+  1|cpu) PROFILE_ARGS="--profile=cpu" ;;
+  mem) PROFILE_ARGS="--profile=mem" ;;
+  *) PROFILE_ARGS="" ;;
+esac
+
 # 현재 시간 출력 함수
 timestamp() {
   date +"%Y-%m-%d %H:%M:%S"
@@ -16,11 +23,22 @@ cd "$SCRIPT_DIR"
 
 # modeling_FS.py 실행
 echo "$(timestamp): Running modeling_FS.py" >> "$LOG_FILE"
-python3 modeling_FS.py >> "$LOG_FILE" 2>&1
+python3 modeling_FS.py $PROFILE_ARGS >> "$LOG_FILE" 2>&1
 
 if [ $? -ne 0 ]; then
   echo "$(timestamp): modeling_FS.py failed" >> "$LOG_FILE"
   exit 1
 fi
 
-echo "$(timestamp): modeling_FS.py completed successfully" >> "$LOG_FILE"
\ No newline at end of file
+echo "$(timestamp): modeling_FS.py completed successfully" >> "$LOG_FILE"
+
+# historical-valuation.py 실행 (새 분기만 공시일 기준 종가와 결합)
+echo "$(timestamp): Running historical-valuation.py" >> "$LOG_FILE"
+python3 historical-valuation.py $PROFILE_ARGS >> "$LOG_FILE" 2>&1
+
+if [ $? -ne 0 ]; then
+  echo "$(timestamp): historical-valuation.py failed" >> "$LOG_FILE"
+  exit 1
+fi
+
+echo "$(timestamp): historical-valuation.py completed successfully" >> "$LOG_FILE"
\ No newline at end of file
@@ -1,42 +1,14 @@
 #!/usr/bin/env python3
-import json
-import ssl
-import certifi
-import csv
+import argparse
 import os
-from urllib.request import urlopen, Request
-from datetime import datetime
+from fmp_client import default_policy, CircuitOpenError, FMPRequestError
+from ticker_universe import load_ticker_table, tickers_to_backfill, record_failures
+from profiling import run_main, step
+from statement_decoder import StatementColumns, StatementWriter, INCOME_STATEMENT_FIELDS
 
-def get_jsonparsed_data(url, api_key):
-    context = ssl.create_default_context(cafile=certifi.where())
-    headers = {
-        'User-Agent': 'Mozilla/5.0',
-        'Authorization': f'Bearer {api_key}'
-    }
-    req = Request(url, headers=headers)
-    with urlopen(req, context=context) as response:
-        data = response.read().decode("utf-8")
-    return json.loads(data)
-
-def read_ticker_list(file_path):
-    tickers = []
-    with open(file_path, 'r') as csvfile:
-        reader = csv.DictReader(csvfile)
-        for row in reader:
-            row['Ticker'] = row['Ticker'].replace('/', '.')
-            tickers.append(row)
-    return tickers
-
-def save_to_csv(data, file_path, mode='w'):
-    if not data:
-        print("No data to save.")
-        return
-    keys = data[0].keys()
-    with open(file_path, mode, newline='') as output_file:
-        dict_writer = csv.DictWriter(output_file, keys)
-        if mode == 'w':
-            dict_writer.writeheader()
-        dict_writer.writerows(data)
+def get_raw_data(url, api_key):
+    # Retries, backoff, pacing and the circuit breaker are handled by the shared request policy
+    return default_policy.get(url, {'Authorization': f'Bearer {api_key}'})
 
 def truncate_file(file_path):
     """
@@ -45,7 +17,34 @@ def truncate_file(file_path):
     """
     open(file_path, 'w').close()
 
+def fetch_ticker(columns, writer, base_url, api_key, ticker_info):
+    """Fetch and buffer one ticker. Returns False when the request failed, True otherwise (including no data)."""
+    ticker = ticker_info['Ticker']
+    url = f"{base_url}{ticker}?period=quarter&limit=80&apikey={api_key}"
+
+    try:
+        raw = get_raw_data(url, api_key)
+        # 응답 bytes를 고정 스키마 컬럼 버퍼로 바로 파싱
+        with step('decode') as decoded:
+            decoded.rows = columns.decode(raw)
+        if decoded.rows:
+            # 최신 분기가 먼저 오도록 정렬하고 첫 행을 is_recent_quarter로 표시
+            writer.add(columns.iter_rows(ticker_info))
+            print(f"Income statement data for {ticker} has been saved.")
+        else:
+            print(f"No income statement data for {ticker}.")
+        return True
+    except CircuitOpenError:
+        raise
+    except (FMPRequestError, ValueError) as e:
+        print(f"An error occurred while processing {ticker}: {e}")
+        return False
+
 def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--added-only', action='store_true', help='fetch only tickers added to the universe or not fetched since the last run')
+    args = parser.parse_args()
+
     api_key = 'YOUR_API_KEY'
     base_url = "https://financialmodelingprep.com/api/v3/income-statement/"
     ticker_list_path = "/path/to/your/ticker-list.csv"
@@ -54,41 +53,30 @@ def main():
     # Truncate the output file before starting
     truncate_file(output_file_path)
 
-    tickers = read_ticker_list(ticker_list_path)
+    tickers = load_ticker_table(ticker_list_path)
+    if args.added_only:
+        backfill = tickers_to_backfill(ticker_list_path)
+        tickers = [row for row in tickers if row['Ticker'] in backfill]
+        print(f"Backfilling {len(tickers)} added or previously failed tickers")
 
-    for index, ticker_info in enumerate(tickers):
-        ticker = ticker_info['Ticker']
-        url = f"{base_url}{ticker}?period=quarter&limit=80&apikey={api_key}"
+    columns = StatementColumns(INCOME_STATEMENT_FIELDS)
 
-        try:
-            data = get_jsonparsed_data(url, api_key)
-            if data:
-                # Sort data by date to ensure the most recent quarter is first
-                data.sort(key=lambda x: datetime.strptime(x['date'], '%Y-%m-%d'), reverse=True)
-                
-                # Mark the most recent quarter
-                data[0]['is_recent_quarter'] = True
-                
-                # Add additional information to each data point
-                for item in data:
-                    item.update({
-                        'Company Name': ticker_info['Company Name'],
-                        'Market Cap': ticker_info['Market Cap'],
-                        'Country': ticker_info['Country'],
-                        'Sector': ticker_info['Sector'],
-                        'Industry': ticker_info['Industry'],
-                        'is_recent_quarter': item.get('is_recent_quarter', False)
-                    })
-                    item.pop('link', None)  # finalLink는 제거하지 않습니다
+    with StatementWriter(output_file_path, INCOME_STATEMENT_FIELDS) as writer:
+        failed = []
+        for ticker_info in tickers:
+            if not fetch_ticker(columns, writer, base_url, api_key, ticker_info):
+                failed.append(ticker_info)
 
-                # Write to CSV (append mode for all except the first ticker)
-                mode = 'w' if index == 0 else 'a'
-                save_to_csv(data, output_file_path, mode)
-                print(f"Income statement data for {ticker} has been saved.")
-        except Exception as e:
-            print(f"An error occurred while processing {ticker}: {e}")
+        # Retry failed tickers once at the end of the run instead of dropping them silently
+        if failed:
+            print(f"Retrying {len(failed)} failed tickers...")
+            failed = [t for t in failed if not fetch_ticker(columns, writer, base_url, api_key, t)]
 
+    # Tickers that still failed are fetched again on the next incremental run
+    record_failures(ticker_list_path, 'income-statement', [t['Ticker'] for t in failed])
+    if failed:
+        print(f"Failed to fetch {len(failed)} tickers: {', '.join(t['Ticker'] for t in failed)}")
     print(f"All income statement data has been saved to {output_file_path}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    run_main('fetch-IS', main)
\ No newline at end of file
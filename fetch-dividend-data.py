@@ -1,24 +1,23 @@
 #!/usr/bin/env python3
-import csv
-import requests
 from datetime import datetime
-import time
 import pandas as pd
 import os
+from atomic_publish import publish_csv
+from ticker_universe import load_tickers
+from fmp_client import default_policy, CircuitOpenError, FMPRequestError
+from profiling import run_main
 
 # Load API key from environment variable
 API_KEY = os.environ.get("FINANCIAL_MODELING_PREP_API_KEY")
 BASE_URL = "https://financialmodelingprep.com/api/v3/historical-price-full/stock_dividend/{ticker}?apikey={api_key}"
 
 def fetch_dividend_data(ticker):
+    """Return the dividend history, or [] when the ticker has none. Request failures raise FMPRequestError."""
     url = BASE_URL.format(ticker=ticker, api_key=API_KEY)
-    response = requests.get(url)
-    if response.status_code == 200:
-        data = response.json()
-        if 'historical' in data:
-            print(f"  Successfully fetched data for {ticker}.")
-            return data['historical']
-    print(f"  Failed to fetch data for {ticker}.")
+    data = default_policy.get_json(url)
+    if 'historical' in data:
+        print(f"  Successfully fetched data for {ticker}.")
+        return data['historical']
     return []
 
 def classify_dividend_frequency(sub_df):
@@ -42,17 +41,22 @@ def main():
     print("Starting to fetch and process dividend data for all tickers...")
     
     # Read all tickers from ticker-list.csv file
-    with open('ticker-list.csv', 'r') as f:
-        reader = csv.reader(f)
-        next(reader)  # Skip header
-        tickers = [row[0] for row in reader]
+    tickers = load_tickers('ticker-list.csv')
     
     print(f"Processing a total of {len(tickers)} tickers.")
 
     all_data = []
+    failed = []
     for i, ticker in enumerate(tickers, 1):
         print(f"\nProcessing ticker {i}/{len(tickers)}: {ticker}")
-        dividend_data = fetch_dividend_data(ticker)
+        try:
+            dividend_data = fetch_dividend_data(ticker)
+        except CircuitOpenError:
+            raise
+        except FMPRequestError as e:
+            print(f"  Failed to fetch data for {ticker}: {e}")
+            failed.append(ticker)
+            continue
         if dividend_data:
             for item in dividend_data:
                 all_data.append({
@@ -64,12 +68,13 @@ def main():
         else:
             print(f"  No dividend data found for {ticker}.")
         
-        time.sleep(0.5)  # Wait 0.5 seconds between API requests
-        
         # Show progress
         if i % 10 == 0 or i == len(tickers):
             print(f"Progress: {i}/{len(tickers)} tickers processed ({i/len(tickers)*100:.2f}%)")
 
+    if failed:
+        print(f"\nFailed to fetch dividend data for {len(failed)} tickers: {', '.join(failed)}")
+
     df = pd.DataFrame(all_data)
     if not df.empty:
         df_sorted = df.sort_values(['Ticker', 'Date'], ascending=[True, False])
@@ -85,7 +90,7 @@ def main():
                 print(f"  No data for {ticker}.")
 
         print("\nSaving results to dividend_data.csv file...")
-        df.to_csv('dividend_data.csv', index=False)
+        publish_csv(df, 'dividend_data.csv')
         print("Data fetching and processing completed. Results saved to dividend_data.csv file.")
         print(f"Processed data for a total of {len(df['Ticker'].unique())} tickers.")
 
@@ -96,4 +101,4 @@ def main():
         print("No data to process.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    run_main('fetch-dividend-data', main)
\ No newline at end of file
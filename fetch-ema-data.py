@@ -1,11 +1,12 @@
 #!/usr/bin/env python3
 import csv
-import requests
 import time
 from datetime import datetime
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
 import os
+from atomic_publish import publish_file
+from ticker_universe import load_tickers
+from fmp_client import default_policy, CircuitOpenError, FMPRequestError
+from profiling import run_main
 
 # Load API key from environment variable
 API_KEY = os.environ.get("FINANCIAL_MODELING_PREP_API_KEY")
@@ -21,22 +22,17 @@ def preprocess_ticker(ticker):
     return ticker.replace('/', '.')
 
 def get_ema_data(ticker, period):
-    """Fetch EMA data for the given ticker and period."""
+    """Fetch EMA data for the given ticker and period.
+    Returns None when the API has no data; request failures raise FMPRequestError."""
     processed_ticker = preprocess_ticker(ticker)
     url = f"https://financialmodelingprep.com/api/v3/technical_indicator/daily/{processed_ticker}?period={period}&type=ema&apikey={API_KEY}"
     
-    try:
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
-        
-        if data and isinstance(data, list) and len(data) > 0:
-            return float(data[0]['ema'])
-        else:
-            print(f"No data found for: {processed_ticker}, period: {period}")
-            return None
-    except requests.RequestException as e:
-        print(f"API request error ({processed_ticker}, period: {period}): {e}")
+    data = default_policy.get_json(url)
+    
+    if data and isinstance(data, list) and len(data) > 0:
+        return float(data[0]['ema'])
+    else:
+        print(f"No data found for: {processed_ticker}, period: {period}")
         return None
 
 def is_uptrend(ema_100, ema_400):
@@ -46,6 +42,10 @@ def is_uptrend(ema_100, ema_400):
 def process_tickers(input_file, output_file):
     """Process the list of tickers from the input file and save results to the output file and Google Sheets."""
     # Google Sheets authentication and worksheet opening
+    # Imported here so that loading this module does not pull in the Google client libraries
+    import gspread
+    from oauth2client.service_account import ServiceAccountCredentials
+
     creds = ServiceAccountCredentials.from_json_keyfile_name(CREDS_JSON, SCOPE)
     client = gspread.authorize(creds)
     sheet = client.open_by_key(SHEET_ID).worksheet(SHEET_NAME)
@@ -58,39 +58,41 @@ def process_tickers(input_file, output_file):
     sheet.append_row(headers)
 
     results = []
-    with open(input_file, 'r') as infile, open(output_file, 'w', newline='') as outfile:
-        reader = csv.reader(infile)
+    failed = []
+    # The new version is only published if the whole loop finishes
+    with publish_file(output_file) as outfile:
         writer = csv.writer(outfile)
         
         writer.writerow(headers)
         
-        # Skip header row
-        next(reader)
-        
-        for row in reader:
-            if row:  # Skip empty rows
-                ticker = row[0]  # Get ticker symbol from the first column
-                print(f"Processing: {ticker}")
-                
+        for ticker in load_tickers(input_file):
+            print(f"Processing: {ticker}")
+            
+            try:
                 ema_100 = get_ema_data(ticker, 100)
-                time.sleep(0.5)  # Wait 0.5 seconds between API requests
                 ema_400 = get_ema_data(ticker, 400)
-                
-                if ema_100 is not None and ema_400 is not None:
-                    current_date = datetime.now().strftime("%Y-%m-%d")
-                    uptrend = is_uptrend(ema_100, ema_400)
-                    result_row = [ticker, current_date, ema_100, ema_400, uptrend]
-                    writer.writerow(result_row)
-                    results.append(result_row)
-                
-                time.sleep(0.5)  # Wait 0.5 seconds before processing the next ticker
+            except CircuitOpenError:
+                raise
+            except FMPRequestError as e:
+                print(f"API request error ({ticker}): {e}")
+                failed.append(ticker)
+                continue
+            
+            if ema_100 is not None and ema_400 is not None:
+                current_date = datetime.now().strftime("%Y-%m-%d")
+                uptrend = is_uptrend(ema_100, ema_400)
+                result_row = [ticker, current_date, ema_100, ema_400, uptrend]
+                writer.writerow(result_row)
+                results.append(result_row)
+
+    if failed:
+        print(f"Failed to fetch EMA data for {len(failed)} tickers: {', '.join(failed)}")
 
     # Upload results to Google Sheets in one batch
     sheet.append_rows(results)
     print(f"Data successfully uploaded to Google Sheets.")
 
-# Main execution part
-if __name__ == "__main__":
+def main():
     input_file = "ticker-list.csv"
     output_file = "ema_results.csv"
     
@@ -99,4 +101,8 @@ if __name__ == "__main__":
     end_time = time.time()
     
     print(f"Processing completed. Results saved to ema_results.csv file and Google Sheets.")
-    print(f"Total execution time: {end_time - start_time:.2f} seconds")
\ No newline at end of file
+    print(f"Total execution time: {end_time - start_time:.2f} seconds")
+
+# Main execution part
+if __name__ == "__main__":
+    run_main('fetch-ema-data', main)
\ No newline at end of file
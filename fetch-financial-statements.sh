@@ -16,6 +16,22 @@ PYTHON_PATH="python"
 # 로그 파일 설정
 LOG_FILE="$SCRIPT_DIR/project-log.log"
 
+# INCREMENTAL=1 이면 유니버스에 새로 추가된 티커만 받아 기존 결과에 병합하고, 삭제된 티커는 제거합니다
+if [ "${INCREMENTAL:-0}" = "1" ]; then
+  FETCH_ARGS="--added-only"
+  MERGE_ARGS="--incremental"
+else
+  FETCH_ARGS=""
+  MERGE_ARGS=""
+fi
+
+# PROFILE=1(또는 cpu) / PROFILE=mem 이면 단계별 프로파일 보고서를 profiles/ 아래에 남깁니다
+case "${PROFILE:-0}" in
+  1|cpu) PROFILE_ARGS="--profile=cpu" ;;
+  mem) PROFILE_ARGS="--profile=mem" ;;
+  *) PROFILE_ARGS="" ;;
+esac
+
 # 현재 시간 출력 함수
 timestamp() {
   date +"%Y-%m-%d %H:%M:%S"
@@ -29,7 +45,7 @@ log_and_echo() {
 
 # Step 1: Run fetch-ticker-list.py
 log_and_echo "Running fetch-ticker-list.py"
-"$PYTHON_PATH" "$SCRIPT_DIR/fetch-ticker-list.py" > /dev/null 2>&1
+"$PYTHON_PATH" "$SCRIPT_DIR/fetch-ticker-list.py" $PROFILE_ARGS > /dev/null 2>&1
 if [ $? -ne 0 ]; then
   log_and_echo "fetch-ticker-list.py failed"
   exit 1
@@ -38,11 +54,11 @@ log_and_echo "fetch-ticker-list.py completed successfully"
 
 # Step 2: Run fetch-IS.py, fetch-BS.py, fetch-CF.py in parallel
 log_and_echo "Running fetch-IS.py, fetch-BS.py, fetch-CF.py in parallel"
-"$PYTHON_PATH" "$SCRIPT_DIR/fetch-IS.py" > /dev/null 2>&1 &
+"$PYTHON_PATH" "$SCRIPT_DIR/fetch-IS.py" $FETCH_ARGS $PROFILE_ARGS > /dev/null 2>&1 &
 PID_IS=$!
-"$PYTHON_PATH" "$SCRIPT_DIR/fetch-BS.py" > /dev/null 2>&1 &
+"$PYTHON_PATH" "$SCRIPT_DIR/fetch-BS.py" $FETCH_ARGS $PROFILE_ARGS > /dev/null 2>&1 &
 PID_BS=$!
-"$PYTHON_PATH" "$SCRIPT_DIR/fetch-CF.py" > /dev/null 2>&1 &
+"$PYTHON_PATH" "$SCRIPT_DIR/fetch-CF.py" $FETCH_ARGS $PROFILE_ARGS > /dev/null 2>&1 &
 PID_CF=$!
 
 # Wait for all parallel jobs to finish
@@ -61,7 +77,7 @@ log_and_echo "All fetch scripts completed successfully"
 
 # Step 3: Run merge-financial-statements.py and log all output
 log_and_echo "Running merge-financial-statements.py"
-"$PYTHON_PATH" "$SCRIPT_DIR/merge-financial-statements.py" 2>&1 | tee -a "$LOG_FILE"
+"$PYTHON_PATH" "$SCRIPT_DIR/merge-financial-statements.py" $MERGE_ARGS $PROFILE_ARGS 2>&1 | tee -a "$LOG_FILE"
 if [ $? -ne 0 ]; then
   log_and_echo "merge-financial-statements.py failed"
   exit 1
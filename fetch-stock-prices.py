@@ -1,35 +1,22 @@
 #!/usr/bin/env python3
-import json
-import ssl
-import certifi
 import csv
-from urllib.request import urlopen, Request
 import os
+import sys
+from atomic_publish import publish_file
+from ticker_universe import load_tickers
+from fmp_client import default_policy
+from profiling import run_main
 
 def get_jsonparsed_data(url):
-    context = ssl.create_default_context(cafile=certifi.where())
-    headers = {
-        'User-Agent': 'Mozilla/5.0'
-    }
-    req = Request(url, headers=headers)
-    with urlopen(req, context=context) as response:
-        data = response.read().decode("utf-8")
-    return json.loads(data)
-
-def read_ticker_list(file_path):
-    tickers = []
-    with open(file_path, 'r') as csvfile:
-        reader = csv.DictReader(csvfile)
-        for row in reader:
-            tickers.append(row['Ticker'])
-    return tickers
+    # Retries, backoff and the circuit breaker are handled by the shared request policy
+    return default_policy.get_json(url)
 
 def save_to_csv(data, file_path):
     if not data:
         print("No data to save.")
         return
     keys = ['symbol', 'price']
-    with open(file_path, 'w', newline='') as output_file:
+    with publish_file(file_path) as output_file:
         dict_writer = csv.DictWriter(output_file, keys)
         dict_writer.writeheader()
         dict_writer.writerows(data)
@@ -42,22 +29,21 @@ def main():
     ticker_list_path = os.path.join(base_dir, "ticker-list.csv")
     output_file_path = os.path.join(base_dir, "real_time_stock_prices.csv")
 
-    tickers = read_ticker_list(ticker_list_path)
+    tickers = load_tickers(ticker_list_path)
     tickers_set = set(tickers)
 
-    try:
-        data = get_jsonparsed_data(base_url)
-        if data:
-            filtered_data = [
-                {'symbol': item['symbol'], 'price': item['lastSalePrice']}
-                for item in data if item['symbol'] in tickers_set
-            ]
-            save_to_csv(filtered_data, output_file_path)
-            print(f"Filtered data has been saved to {output_file_path}")
-        else:
-            print("No data returned from API.")
-    except Exception as e:
-        print(f"An error occurred: {e}")
+    # Request failures (FMPRequestError, CircuitOpenError) propagate and fail the stage,
+    # so later stages never run on a stale real_time_stock_prices.csv
+    data = get_jsonparsed_data(base_url)
+    filtered_data = [
+        {'symbol': item['symbol'], 'price': item['lastSalePrice']}
+        for item in data or [] if item['symbol'] in tickers_set
+    ]
+    if not filtered_data:
+        print("No data returned from API.")
+        sys.exit(1)
+    save_to_csv(filtered_data, output_file_path)
+    print(f"Filtered data has been saved to {output_file_path}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    run_main('fetch-stock-prices', main)
\ No newline at end of file
@@ -1,9 +1,14 @@
 #!/usr/bin/env python3
-import pandas as pd
-from google.oauth2.service_account import Credentials
-from googleapiclient.discovery import build
+from atomic_publish import publish_csv
+from ticker_universe import refresh_universe
+from profiling import run_main
 
 def download_google_sheet(spreadsheet_id, range_name, credentials_path, output_path):
+    # Imported lazily to keep startup cheap when this module is loaded by pipeline.py
+    import pandas as pd
+    from google.oauth2.service_account import Credentials
+    from googleapiclient.discovery import build
+
     # Authenticate and create the Sheets API service
     creds = Credentials.from_service_account_file(credentials_path, scopes=['https://www.googleapis.com/auth/spreadsheets.readonly'])
     service = build('sheets', 'v4', credentials=creds)
@@ -21,9 +26,12 @@ def download_google_sheet(spreadsheet_id, range_name, credentials_path, output_p
     df = pd.DataFrame(values[1:], columns=values[0])
 
     # Save the DataFrame as a CSV file
-    df.to_csv(output_path, index=False)
+    publish_csv(df, output_path)
     print(f"Data has been saved to {output_path}")
 
+    # Record added/removed/renamed tickers relative to the previous run
+    refresh_universe(output_path)
+
 def main():
     # Set up the parameters
     spreadsheet_id = 'YOUR_SPREADSHEET_ID'
@@ -35,4 +43,4 @@ def main():
     download_google_sheet(spreadsheet_id, range_name, credentials_path, output_path)
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    run_main('fetch-ticker-list', main)
\ No newline at end of file
@@ -30,34 +30,28 @@ log "Python 버전: $(python --version)"
 # 시작 시간 기록
 start_time=$(date +%s)
 
-# 함수: Python 스크립트 실행
-run_python_script() {
-    local script_name="$1"
-    log "$script_name 실행 시작"
-    "$PYTHON_PATH" "$SCRIPT_DIR/$script_name"
-    if [ $? -ne 0 ]; then
-        log "오류: $script_name 실행 실패"
-        log "Python 스크립트 오류 출력:"
-        "$PYTHON_PATH" "$SCRIPT_DIR/$script_name" 2>> "$LOG_FILE"
-        exit 1
-    fi
-    log "$script_name 실행 완료"
-}
-
-# 1. 주식 가격 가져오기
-run_python_script "fetch-stock-prices.py"
-
-# 2. 주가와 재무제표 데이터 통합
-run_python_script "integrate-price-with-FS.py"
-
-# 3. EMA와 재무제표 데이터 통합
-run_python_script "integrate-ema-with-FS.py"
-
-# 4. 최종 처리
-run_python_script "final-processing.py"
-
-# 5. 통합된 데이터를 GCS에 업로드
-run_python_script "upload_FS_to_GCS.py"
+# 1~7. 주가 수집, 통합, 최종 처리, 순위 계산, 스냅샷, GCS 업로드를 하나의 인터프리터에서 실행
+# (pandas 등 무거운 모듈을 단계마다 다시 import 하지 않음)
+# PROFILE=1(또는 cpu) / PROFILE=mem 이면 단계별 프로파일 보고서를 profiles/ 아래에 남깁니다
+PIPELINE_OPTS=()
+case "${PROFILE:-0}" in
+    1|cpu) PIPELINE_OPTS+=(--profile=cpu) ;;
+    mem) PIPELINE_OPTS+=(--profile=mem) ;;
+esac
+log "pipeline.py 실행 시작"
+"$PYTHON_PATH" "$SCRIPT_DIR/pipeline.py" "${PIPELINE_OPTS[@]}" run \
+    fetch-stock-prices \
+    integrate-price-with-FS \
+    integrate-ema-with-FS \
+    final-processing \
+    peer-ranking \
+    snapshot \
+    upload-FS-to-GCS 2>&1 | tee -a "$LOG_FILE"
+if [ ${PIPESTATUS[0]} -ne 0 ]; then
+    log "오류: pipeline.py 실행 실패"
+    exit 1
+fi
+log "pipeline.py 실행 완료"
 
 # 종료 시간 기록 및 총 소요 시간 계산
 end_time=$(date +%s)
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+import json
+import random
+import ssl
+import time
+from email.utils import parsedate_to_datetime
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlparse
+from urllib.request import urlopen, Request
+
+import certifi
+
+from profiling import step
+
+# FMP API 공통 요청 정책
+#   - 429/5xx/네트워크 오류는 지수 백오프 + 지터로 재시도하고 Retry-After 헤더를 따릅니다
+#   - 스로틀링이 관찰되면 요청 간격을 늘리고, 성공이 이어지면 다시 줄입니다
+#   - 200 응답이라도 본문이 FMP 에러 객체({"Error Message": ...})면 실패로 봅니다 (한도 초과는 스로틀링으로 처리)
+#   - 같은 엔드포인트에서 재시도 대상 실패(429/5xx/네트워크/한도 초과)가 연속되면 서킷 브레이커가 열립니다.
+#     404 같은 티커별 실패는 브레이커에 포함하지 않습니다
+#   - 401/403이나 API 키 오류 본문은 재시도해도 소용없으므로 바로 브레이커를 엽니다
+#   - 열린 브레이커는 cooldown초 뒤 반열림 상태가 되어 재시도 없는 요청 하나를 보내 보고,
+#     성공하면 닫히고 실패하면 다시 cooldown만큼 열립니다
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+AUTH_STATUS = {401, 403}
+AUTH_ERROR_MARKERS = ('api key', 'apikey')
+
+class FMPRequestError(Exception):
+    """재시도 후에도 실패한 요청. status는 HTTP 상태 코드(네트워크 오류면 None)입니다."""
+
+    def __init__(self, url, status, message):
+        super().__init__(f"{message} (status={status})")
+        self.url = url
+        self.status = status
+
+class CircuitOpenError(Exception):
+    """엔드포인트가 계속 실패하거나 인증이 거부되어 서킷 브레이커가 열린 상태.
+    수집 스크립트는 이 예외에서 실행을 멈추고, 계속 도는 프로세스는 cooldown 뒤에 다시 시도합니다."""
+
+class RequestPolicy:
+    def __init__(self, min_interval=0.1, initial_interval=0.5, max_interval=10.0, max_retries=5,
+                 backoff_base=1.0, backoff_cap=60.0, failure_threshold=10, cooldown=300.0, speedup_after=20,
+                 timeout=30):
+        self.min_interval = min_interval
+        self.interval = initial_interval
+        self.max_interval = max_interval
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.speedup_after = speedup_after
+        self.timeout = timeout
+        self.last_request = 0.0
+        self.success_streak = 0
+        self.consecutive_failures = {}
+        self.opened_at = {}
+        self.context = ssl.create_default_context(cafile=certifi.where())
+
+    def _pace(self):
+        wait = self.last_request + self.interval - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        self.last_request = time.monotonic()
+
+    def _on_throttled(self):
+        self.success_streak = 0
+        self.interval = min(self.max_interval, self.interval * 2)
+
+    def _on_success(self):
+        self.success_streak += 1
+        if self.success_streak >= self.speedup_after:
+            self.success_streak = 0
+            self.interval = max(self.min_interval, self.interval * 0.8)
+
+    def _backoff(self, attempt, retry_after=None):
+        if retry_after is not None:
+            return min(self.backoff_cap, retry_after)
+        # full jitter
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** attempt)))
+
+    @staticmethod
+    def _retry_after(headers):
+        value = headers.get('Retry-After') if headers else None
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+            except (TypeError, ValueError):
+                return None
+
+    @staticmethod
+    def _error_message(body):
+        # 정상 응답은 대부분 리스트이므로 객체로 시작하고 에러 키가 있을 때만 파싱합니다
+        if not body.lstrip().startswith(b'{') or b'"Error Message"' not in body:
+            return None
+        try:
+            data = json.loads(body)
+        except ValueError:
+            return None
+        return data.get('Error Message') if isinstance(data, dict) else None
+
+    @staticmethod
+    def endpoint(url):
+        parts = urlparse(url).path.strip('/').split('/')
+        return '/'.join(parts[:3])
+
+    @staticmethod
+    def _is_auth_error(message):
+        message = message.lower()
+        return any(marker in message for marker in AUTH_ERROR_MARKERS)
+
+    def _open_circuit(self, endpoint, reason):
+        self.consecutive_failures[endpoint] = max(self.consecutive_failures.get(endpoint, 0), self.failure_threshold)
+        self.opened_at[endpoint] = time.monotonic()
+        raise CircuitOpenError(f"{reason} on {endpoint}; circuit open for {self.cooldown:.0f}s")
+
+    def _record_failure(self, endpoint):
+        failures = self.consecutive_failures.get(endpoint, 0) + 1
+        self.consecutive_failures[endpoint] = failures
+        if failures >= self.failure_threshold:
+            self._open_circuit(endpoint, f"{failures} consecutive failures")
+
+    def _close_circuit(self, endpoint):
+        self.consecutive_failures[endpoint] = 0
+        self.opened_at.pop(endpoint, None)
+
+    def get(self, url, headers=None):
+        """요청 본문(bytes)을 반환합니다. 재시도할 수 없거나 재시도 후에도 실패하면 FMPRequestError를 던집니다."""
+        endpoint = self.endpoint(url)
+        probe = self.consecutive_failures.get(endpoint, 0) >= self.failure_threshold
+        if probe:
+            remaining = self.opened_at.get(endpoint, 0.0) + self.cooldown - time.monotonic()
+            if remaining > 0:
+                raise CircuitOpenError(f"Circuit for {endpoint} is open ({remaining:.0f}s until next probe)")
+            print(f"  Circuit for {endpoint} is half-open; sending probe request")
+        max_retries = 0 if probe else self.max_retries
+
+        headers = dict({'User-Agent': 'Mozilla/5.0'}, **(headers or {}))
+        error = None
+        retryable = True
+        for attempt in range(max_retries + 1):
+            with step('fmp:pace'):
+                self._pace()
+            retry_after = None
+            try:
+                with step(f"fmp:{endpoint}"):
+                    with urlopen(Request(url, headers=headers), context=self.context, timeout=self.timeout) as response:
+                        body = response.read()
+                message = self._error_message(body)
+                if message is None:
+                    self._on_success()
+                    self._close_circuit(endpoint)
+                    return body
+                if self._is_auth_error(message):
+                    self._open_circuit(endpoint, f"API key rejected ({message})")
+                error = FMPRequestError(url, 200, f"API error on {endpoint}: {message}")
+                if 'limit' not in message.lower():
+                    retryable = False
+                    break
+                self._on_throttled()
+            except HTTPError as e:
+                if e.code in AUTH_STATUS:
+                    self._open_circuit(endpoint, f"HTTP {e.code}")
+                error = FMPRequestError(url, e.code, f"HTTP error on {endpoint}")
+                if e.code not in RETRYABLE_STATUS:
+                    retryable = False
+                    break
+                if e.code == 429:
+                    self._on_throttled()
+                retry_after = self._retry_after(e.headers)
+            except (URLError, OSError) as e:
+                error = FMPRequestError(url, None, f"Network error on {endpoint}: {getattr(e, 'reason', e)}")
+            if attempt < max_retries:
+                delay = self._backoff(attempt, retry_after)
+                print(f"  Retrying {endpoint} in {delay:.1f}s ({error})")
+                time.sleep(delay)
+
+        # 티커별 실패(404 등)는 엔드포인트 장애가 아니므로 브레이커에 세지 않습니다.
+        # 반열림 요청이 이런 응답을 받았다면 엔드포인트는 응답하고 있으므로 브레이커를 닫습니다
+        if retryable:
+            self._record_failure(endpoint)
+        elif probe:
+            self._close_circuit(endpoint)
+        raise error
+
+    def get_json(self, url, headers=None):
+        return json.loads(self.get(url, headers))
+
+# 스크립트 하나에서 공유하는 기본 정책
+default_policy = RequestPolicy()
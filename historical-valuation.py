@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+import os
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from atomic_publish import publish_csv
+from fmp_client import default_policy, FMPRequestError
+from ticker_universe import load_tickers
+from profiling import run_main, step
+
+# Load API key from environment variable
+API_KEY = os.environ.get("FINANCIAL_MODELING_PREP_API_KEY")
+BASE_URL = "https://financialmodelingprep.com/api/v3/historical-price-full/{ticker}?serietype=line&from={start}&to={end}&apikey={api_key}"
+
+VALUATION_COLUMNS = ['symbol', 'date', 'fillingDate', 'close', 'PBR', 'PER', 'PFFO', 'PER_TTM', 'PFFO_TTM']
+
+def fetch_daily_closes(ticker, start, end):
+    url = BASE_URL.format(ticker=ticker, start=start, end=end, api_key=API_KEY)
+    data = default_policy.get_json(url)
+    if 'historical' in data:
+        return [{'symbol': ticker, 'date': item['date'], 'close': item['close']} for item in data['historical']]
+    return []
+
+def load_csv(file_path, columns):
+    if os.path.exists(file_path):
+        return pd.read_csv(file_path)
+    return pd.DataFrame(columns=columns)
+
+def shift_date(date, days):
+    return (datetime.strptime(date, '%Y-%m-%d') + timedelta(days=days)).strftime('%Y-%m-%d')
+
+def merge_coverage(*frames):
+    coverage = pd.concat(frames).groupby(level=0).agg({'covered_from': 'min', 'covered_to': 'max'})
+    return coverage.rename_axis('symbol')
+
+def load_coverage(file_path, history):
+    """심볼별로 이미 요청한 구간 (covered_from, covered_to). 비어 있던 구간(상장 전 등)도 포함합니다.
+    기록이 없는 심볼은 저장된 첫/마지막 종가 날짜를 씁니다."""
+    dates = history.groupby('symbol')['date']
+    coverage = pd.DataFrame({'covered_from': dates.min(), 'covered_to': dates.max()})
+    if os.path.exists(file_path):
+        coverage = merge_coverage(coverage, pd.read_csv(file_path, index_col='symbol'))
+    return coverage
+
+def history_ranges(symbol, earliest, coverage, last_dates, today):
+    """받아야 할 (시작, 끝) 구간. 요청한 적 있는 구간 뒤의 새 종가와, 그보다 이른 공시일이 있으면 그 앞 구간입니다."""
+    # 공시일 직전 거래일 종가를 찾을 수 있도록 일주일 여유를 둡니다
+    needed_start = shift_date(earliest, -7)
+    if symbol not in coverage.index:
+        return [(needed_start, today)]
+    covered_from, covered_to = coverage.loc[symbol, ['covered_from', 'covered_to']]
+    ranges = []
+    if needed_start < covered_from:
+        ranges.append((needed_start, shift_date(covered_from, -1)))
+    # 저장된 종가가 있으면 그 다음 날부터, 없으면 마지막으로 요청한 날부터 다시 받습니다
+    start = shift_date(last_dates[symbol], 1) if symbol in last_dates.index else covered_to
+    if start <= today:
+        ranges.append((start, today))
+    return ranges
+
+def update_price_history(history, coverage, needed_from):
+    """심볼별로 요청한 적 없는 구간의 종가만 받아 붙입니다. (이력, 요청한 구간, 새로 받은 행 수)를 반환합니다."""
+    last_dates = history.groupby('symbol')['date'].max()
+    today = datetime.now().strftime('%Y-%m-%d')
+    new_rows = []
+    covered = {}
+    for i, (symbol, earliest) in enumerate(needed_from.items(), 1):
+        for start, end in history_ranges(symbol, earliest, coverage, last_dates, today):
+            try:
+                new_rows.extend(fetch_daily_closes(symbol, start, end))
+            except FMPRequestError as e:
+                # 이 심볼의 분기는 종가가 없으므로 다음 실행에서 다시 시도됩니다
+                print(f"  Failed to fetch price history for {symbol}: {e}")
+                continue
+            # 비어 있던 구간도 요청한 구간으로 기록해 다시 받지 않습니다
+            low, high = covered.get(symbol, (start, end))
+            covered[symbol] = (min(low, start), max(high, end))
+        if i % 100 == 0:
+            print(f"Progress: {i}/{len(needed_from)} symbols checked")
+
+    if new_rows:
+        history = pd.concat([history, pd.DataFrame(new_rows)], ignore_index=True)
+        history = history.drop_duplicates(['symbol', 'date'], keep='last')
+    if covered:
+        fetched = pd.DataFrame.from_dict(covered, orient='index', columns=['covered_from', 'covered_to'])
+        coverage = merge_coverage(coverage, fetched)
+    return history, coverage, len(new_rows)
+
+def unvaluable(quarters, history, coverage):
+    """요청한 구간이 공시일 전 일주일까지 닿는데도 공시일 이전 종가가 없는 분기 (상장 전 공시 등)."""
+    first_close = quarters['symbol'].map(history.groupby('symbol')['date'].min()).fillna('9999')
+    covered_from = quarters['symbol'].map(coverage['covered_from']).fillna('9999')
+    needed_start = quarters['fillingDate'].map(lambda date: shift_date(date, -7))
+    return (quarters['fillingDate'] < first_close) & (covered_from <= needed_start)
+
+def attach_asof_close(quarters, history):
+    """각 분기에 공시일(fillingDate) 기준 직전 거래일 종가를 전 심볼 한 번의 merge_asof로 붙입니다."""
+    left = quarters.assign(fillingDate=pd.to_datetime(quarters['fillingDate'])).sort_values('fillingDate')
+    right = history.assign(price_date=pd.to_datetime(history['date']))[['symbol', 'price_date', 'close']]
+    right = right.sort_values('price_date')
+    merged = pd.merge_asof(left, right, left_on='fillingDate', right_on='price_date', by='symbol',
+                           direction='backward')
+    merged['fillingDate'] = merged['fillingDate'].dt.strftime('%Y-%m-%d')
+    return merged.drop(columns=['price_date'])
+
+def compute_valuation(df):
+    # integrate-price-with-FS.py, final-processing.py와 같은 방식 (분기 EPS/FFO 기준, PER/PFFO는 4로 나눔)
+    close = df['close']
+    df['PBR'] = (close / df['Equity_per_Share'].replace(0, np.nan)).round(4)
+    df['PER'] = (close / df['EPS'].replace(0, np.nan)).round(4) / 4
+    df['PFFO'] = (close / df['FFO_per_Share'].replace(0, np.nan)).round(4) / 4
+    df['PER_TTM'] = (close / df['EPS_TTM'].replace(0, np.nan)).round(4)
+    df['PFFO_TTM'] = (close / df['FFO_per_Share_TTM'].replace(0, np.nan)).round(4)
+    return df.replace([np.inf, -np.inf], np.nan)
+
+def main():
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    modeled_file = os.path.join(current_dir, 'modeled_financial_statements.csv')
+    statements_file = os.path.join(current_dir, 'financial_statements.csv')
+    history_file = os.path.join(current_dir, 'price_history.csv')
+    coverage_file = os.path.join(current_dir, 'price_history_coverage.csv')
+    output_file = os.path.join(current_dir, 'historical_valuation.csv')
+    ticker_list_file = os.path.join(current_dir, 'ticker-list.csv')
+
+    with step('load') as record:
+        modeled = pd.read_csv(modeled_file, usecols=['symbol', 'date', 'EPS', 'Equity_per_Share', 'FFO_per_Share',
+                                                       'EPS_TTM', 'FFO_per_Share_TTM'])
+        filings = pd.read_csv(statements_file, usecols=['symbol', 'date', 'fillingDate'])
+        quarters = modeled.merge(filings.drop_duplicates(['symbol', 'date']), on=['symbol', 'date'], how='inner')
+        quarters = quarters.dropna(subset=['fillingDate'])
+        record.rows = len(quarters)
+
+    # 이미 계산된 분기는 건너뜁니다
+    existing = load_csv(output_file, VALUATION_COLUMNS)
+    # 유니버스에서 빠진 티커는 결과와 주가 이력에서 지웁니다
+    universe = set(load_tickers(ticker_list_file))
+    purged = ~existing['symbol'].isin(universe)
+    existing = existing[~purged]
+    # 예전 실행에서 종가 없이 저장된 분기는 다시 계산합니다
+    existing = existing[existing['close'].notna()]
+    done = pd.MultiIndex.from_frame(existing[['symbol', 'date']].astype(str))
+    pending = quarters[~pd.MultiIndex.from_frame(quarters[['symbol', 'date']].astype(str)).isin(done)]
+    if pending.empty:
+        if purged.any():
+            publish_csv(existing, output_file)
+        print("No new quarters to value.")
+        return
+
+    with step('load_history') as record:
+        history = load_csv(history_file, ['symbol', 'date', 'close'])
+        record.rows = len(history)
+    purged_history = ~history['symbol'].isin(universe)
+    history = history[~purged_history]
+    coverage = load_coverage(coverage_file, history)
+    purged_coverage = ~coverage.index.isin(universe)
+    coverage = coverage[~purged_coverage]
+    # 요청한 구간에 공시일 이전 종가가 없는 분기(상장 전 공시 등)는 다시 받지 않고 건너뜁니다
+    skipped = unvaluable(pending, history, coverage)
+    if skipped.any():
+        print(f"Skipping {skipped.sum()} quarters filed before the first available close.")
+        pending = pending[~skipped]
+    print(f"Valuing {len(pending)} new quarters for {pending['symbol'].nunique()} symbols.")
+
+    previous_coverage = coverage
+    with step('update_price_history') as record:
+        history, coverage, fetched = update_price_history(history, coverage,
+                                                          pending.groupby('symbol')['fillingDate'].min())
+        record.rows = fetched
+    # 이력은 새 종가를 받았거나 티커가 빠졌을 때만 다시 씁니다
+    if fetched or purged_history.any():
+        with step('publish_history', rows=len(history)):
+            publish_csv(history.sort_values(['symbol', 'date']), history_file)
+    if purged_coverage.any() or not coverage.equals(previous_coverage):
+        publish_csv(coverage.reset_index(), coverage_file)
+
+    # 공시일 이후 종가가 아직 없는 분기는 다음 실행으로 미룹니다
+    latest_close = history.groupby('symbol')['date'].max()
+    pending = pending[pending['fillingDate'] <= pending['symbol'].map(latest_close).fillna('')]
+
+    with step('attach_asof_close', rows=len(pending)):
+        valued = attach_asof_close(pending, history)
+    with step('compute_valuation', rows=len(valued)):
+        valued = compute_valuation(valued)
+    # 직전 종가를 찾지 못한 분기(이력이 공시일보다 늦게 시작하는 경우 등)는 저장하지 않아 다음 실행에서 다시 시도합니다
+    missing = valued['close'].isna()
+    if missing.any():
+        print(f"{missing.sum()} quarters have no close on or before their filing date; retrying next run.")
+    valued = valued[~missing]
+    if valued.empty and not purged.any():
+        print("No new quarters valued; keeping the existing output.")
+        return
+    result = pd.concat([existing, valued[VALUATION_COLUMNS]], ignore_index=True)
+    result = result.sort_values(['symbol', 'date'], ascending=[True, False])
+    with step('publish', rows=len(result)):
+        publish_csv(result, output_file)
+    print(f"Historical valuation for {len(valued)} quarters saved to {output_file}")
+
+if __name__ == "__main__":
+    run_main('historical-valuation', main)
@@ -1,12 +1,15 @@
 #!/usr/bin/env python3
 import pandas as pd
+from atomic_publish import publish_csv, current_version
+from profiling import run_main
 
 def merge_financial_data():
     # Read ema_results.csv file
     ema_df = pd.read_csv('ema_results.csv')
 
-    # Read FS_with_price.csv file
-    fs_df = pd.read_csv('FS_with_price.csv')
+    # Read FS_with_price.csv file (the version read is checked again when publishing)
+    source_version = current_version('FS_with_price.csv')
+    fs_df = pd.read_csv(source_version)
 
     # Convert Ticker and is_uptrend to dictionary
     uptrend_dict = dict(zip(ema_df['Ticker'], ema_df['is_uptrend']))
@@ -38,9 +41,9 @@ def merge_financial_data():
     fs_df = fs_df.drop(columns=['Ticker'])
 
     # Save the result to FS_with_price.csv file
-    fs_df.to_csv('FS_with_price.csv', index=False)
+    publish_csv(fs_df, 'FS_with_price.csv', expected=source_version)
 
     print("Processing completed. FS_with_price.csv file has been updated with EMA and dividend information.")
 
 if __name__ == "__main__":
-    merge_financial_data()
\ No newline at end of file
+    run_main('integrate-ema-with-FS', merge_financial_data)
\ No newline at end of file
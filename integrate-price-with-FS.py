@@ -1,92 +1,47 @@
 #!/usr/bin/env python3
 
+import argparse
 import pandas as pd
 import numpy as np
 import os
-import time
-from filelock import FileLock
-
-def read_csv_with_lock(file_path, max_wait_time=60):
-    lock_path = file_path + ".lock"
-    lock = FileLock(lock_path, timeout=max_wait_time)
-
-    start_time = time.time()
-    while True:
-        try:
-            with lock:
-                print(f"Starting to read file: {file_path}")
-                df = pd.read_csv(file_path)
-                print(f"Finished reading file: {file_path}")
-            return df
-        except TimeoutError:
-            if time.time() - start_time > max_wait_time:
-                raise TimeoutError(f"Unable to read file for {max_wait_time} seconds: {file_path}")
-            print(f"File is locked. Waiting: {file_path}")
-            time.sleep(1)  # Retry every 1 second
-
-def write_csv_with_lock(df, file_path, max_wait_time=60):
-    lock_path = file_path + ".lock"
-    lock = FileLock(lock_path, timeout=max_wait_time)
-
-    start_time = time.time()
-    while True:
-        try:
-            with lock:
-                print(f"Starting to write file: {file_path}")
-                df.to_csv(file_path, index=False)
-                print(f"Finished writing file: {file_path}")
-            return
-        except TimeoutError:
-            if time.time() - start_time > max_wait_time:
-                raise TimeoutError(f"Unable to write file for {max_wait_time} seconds: {file_path}")
-            print(f"File is locked. Waiting: {file_path}")
-            time.sleep(1)  # Retry every 1 second
+from atomic_publish import publish_csv
+from chunked_io import iter_symbol_chunks, publish_csv_chunks, DEFAULT_MEMORY_BUDGET_MB
+from profiling import run_main, step
 
 # Pandas configuration
 pd.set_option('future.no_silent_downcasting', True)
 
-# Set file paths relative to the current script
-current_dir = os.path.dirname(os.path.abspath(__file__))
-modeled_financial_statements_file = os.path.join(current_dir, 'modeled_financial_statements.csv')
-real_time_stock_prices_file = os.path.join(current_dir, 'real_time_stock_prices.csv')
-output_file = os.path.join(current_dir, 'FS_with_price.csv')
-
-try:
-    # Load CSV files
-    print("Starting to read files...")
-    modeled_financial_statements_df = read_csv_with_lock(modeled_financial_statements_file)
-    real_time_stock_prices_df = read_csv_with_lock(real_time_stock_prices_file)
-    print("All files have been read.")
-
+def integrate_prices(df, price_dict):
+    """Attach real-time prices to the latest quarter of each symbol and compute the price ratios.
+    Every symbol is handled independently, so this works the same on a whole file or on symbol-aligned chunks."""
     # Add price column to all rows and set initial value to None
-    modeled_financial_statements_df['price'] = None
-
-    # Convert real_time_stock_prices_df to dictionary for faster lookup
-    price_dict = dict(zip(real_time_stock_prices_df['symbol'], real_time_stock_prices_df['price']))
+    df['price'] = None
 
     # Add price value to the first row of each symbol
-    for symbol in modeled_financial_statements_df['symbol'].unique():
-        if symbol in price_dict:
-            # Find the index of the first row for the symbol
-            first_row_index = modeled_financial_statements_df[modeled_financial_statements_df['symbol'] == symbol].index[0]
-            # Add price value
-            modeled_financial_statements_df.at[first_row_index, 'price'] = price_dict[symbol]
-
-    # Calculate PBR, PER, PFFO
+    first_rows = ~df['symbol'].duplicated() & df['symbol'].isin(price_dict.keys())
+    df.loc[first_rows, 'price'] = df.loc[first_rows, 'symbol'].map(price_dict)
+
+    # Calculate PBR, PER, PFFO (PER_TTM and PFFO_TTM use trailing-twelve-month EPS/FFO, no /4 needed)
     def calculate_ratios(row):
         price = row['price']
         if pd.isna(price):
-            return pd.Series({'PBR': np.nan, 'PER': np.nan, 'PFFO': np.nan})
+            return pd.Series({'PBR': np.nan, 'PER': np.nan, 'PFFO': np.nan, 'PER_TTM': np.nan, 'PFFO_TTM': np.nan})
         equity_per_share = row['Equity_per_Share']
         eps = row['EPS']
         ffo_per_share = row['FFO_per_Share']
+        eps_ttm = row['EPS_TTM']
+        ffo_per_share_ttm = row['FFO_per_Share_TTM']
         pbr = price / equity_per_share if equity_per_share != 0 else np.nan
         per = price / eps if eps != 0 else np.nan
         pffo = price / ffo_per_share if ffo_per_share != 0 else np.nan
-        return pd.Series({'PBR': pbr, 'PER': per, 'PFFO': pffo})
+        per_ttm = price / eps_ttm if eps_ttm != 0 else np.nan
+        pffo_ttm = price / ffo_per_share_ttm if ffo_per_share_ttm != 0 else np.nan
+        return pd.Series({'PBR': pbr, 'PER': per, 'PFFO': pffo, 'PER_TTM': per_ttm, 'PFFO_TTM': pffo_ttm})
 
     # Calculate and add ratios
-    modeled_financial_statements_df[['PBR', 'PER', 'PFFO']] = modeled_financial_statements_df.apply(calculate_ratios, axis=1)
+    ratio_columns = ['PBR', 'PER', 'PFFO', 'PER_TTM', 'PFFO_TTM']
+    with step('calculate_ratios', rows=len(df)):
+        df[ratio_columns] = df.apply(calculate_ratios, axis=1)
 
     # Round all calculated columns to four decimal places
     columns_to_round = ['EPS', 'FFO_per_Share', 'ROIC', 'ROE', 'CAGR-3-Years', 'CAGR-1-Year',
@@ -95,26 +50,63 @@ try:
                         'Total_Expense_per_Share', 'Revenue_per_Share', 
                         'Operating_Expense_per_Share', 'Invested_Capital_per_Share',
                         'Current_Asset_per_Share', 'Cash_and_Cash_Equivalent_per_Share',
-                        'PBR', 'PER', 'PFFO']
-    modeled_financial_statements_df[columns_to_round] = modeled_financial_statements_df[columns_to_round].round(4)
+                        'PBR', 'PER', 'PFFO', 'PER_TTM', 'PFFO_TTM']
+    with step('round_and_clean', rows=len(df)):
+        df[columns_to_round] = df[columns_to_round].round(4)
+
+        # Replace inf values with NaN
+        df = df.replace([np.inf, -np.inf], np.nan)
+
+        # Replace NaN values with empty string
+        df = df.fillna('')
+
+    return df
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--chunked', action='store_true', help='process symbol-aligned chunks streamed from disk')
+    parser.add_argument('--memory-budget', type=int, default=DEFAULT_MEMORY_BUDGET_MB, help='memory budget in MB for --chunked')
+    args = parser.parse_args()
+
+    # Set file paths relative to the current script
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    modeled_financial_statements_file = os.path.join(current_dir, 'modeled_financial_statements.csv')
+    real_time_stock_prices_file = os.path.join(current_dir, 'real_time_stock_prices.csv')
+    output_file = os.path.join(current_dir, 'FS_with_price.csv')
+
+    try:
+        real_time_stock_prices_df = pd.read_csv(real_time_stock_prices_file)
+        # Convert real_time_stock_prices_df to dictionary for faster lookup
+        price_dict = dict(zip(real_time_stock_prices_df['symbol'], real_time_stock_prices_df['price']))
+
+        if args.chunked:
+            chunks = (integrate_prices(chunk, price_dict)
+                      for chunk in iter_symbol_chunks(modeled_financial_statements_file, args.memory_budget))
+            rows = publish_csv_chunks(chunks, output_file)
+            print(f"Processed {rows} rows have been saved to {output_file}")
+            return
+
+        # Load CSV files
+        print("Starting to read files...")
+        with step('load') as record:
+            modeled_financial_statements_df = pd.read_csv(modeled_financial_statements_file)
+            record.rows = len(modeled_financial_statements_df)
+        print("All files have been read.")
 
-    # Replace inf values with NaN
-    modeled_financial_statements_df = modeled_financial_statements_df.replace([np.inf, -np.inf], np.nan)
+        modeled_financial_statements_df = integrate_prices(modeled_financial_statements_df, price_dict)
 
-    # Replace NaN values with empty string
-    modeled_financial_statements_df = modeled_financial_statements_df.fillna('')
+        # Save the result to a CSV file
+        print("Starting to save the result file...")
+        with step('publish', rows=len(modeled_financial_statements_df)):
+            publish_csv(modeled_financial_statements_df, output_file)
+        print(f"Processed data has been saved to {output_file}")
 
-    # Save the result to a CSV file
-    print("Starting to save the result file...")
-    write_csv_with_lock(modeled_financial_statements_df, output_file)
-    print(f"Processed data has been saved to {output_file}")
+        # Print the top 5 rows
+        print(modeled_financial_statements_df.head())
 
-    # Print the top 5 rows
-    print(modeled_financial_statements_df.head())
+    except Exception as e:
+        print(f"An unexpected error occurred: {e}")
+        print("Terminating the program.")
 
-except TimeoutError as e:
-    print(f"Error: {e}")
-    print("Terminating the program.")
-except Exception as e:
-    print(f"An unexpected error occurred: {e}")
-    print("Terminating the program.")
\ No newline at end of file
+if __name__ == "__main__":
+    run_main('integrate-price-with-FS', main)
@@ -1,8 +1,13 @@
 #!/usr/bin/env python3
+import argparse
 import pandas as pd
 import os
 import subprocess
 import filecmp
+import shutil
+from atomic_publish import publish_file
+from ticker_universe import load_tickers, commit_universe
+from profiling import run_main
 
 def remove_columns(df, columns_to_remove):
     """지정된 컬럼들을 데이터프레임에서 제거합니다."""
@@ -13,7 +18,9 @@ def compare_and_process_files(merged_file, target_file, shell_script):
     if os.path.exists(target_file) and filecmp.cmp(merged_file, target_file):
         print(f"{merged_file}와 {target_file}의 내용이 동일합니다.")
         return
-    os.replace(merged_file, target_file)
+    with open(merged_file, 'rb') as src, publish_file(target_file, mode='wb') as dst:
+        shutil.copyfileobj(src, dst)
+    os.remove(merged_file)
     print(f"{merged_file}를 {target_file}로 덮어썼습니다.")
     try:
         subprocess.run(['sh', shell_script], check=True)
@@ -21,7 +28,23 @@ def compare_and_process_files(merged_file, target_file, shell_script):
     except subprocess.CalledProcessError as e:
         print(f"{shell_script} 스크립트 실행 중 오류가 발생했습니다: {e}")
 
+def combine_with_existing(merged_df, existing_path, universe):
+    """증분 실행: 기존 결과에서 유니버스에 없는 티커와 새로 받은 티커를 빼고, 새로 받은 티커를 붙입니다."""
+    if not os.path.exists(existing_path):
+        return merged_df
+    existing_df = pd.read_csv(existing_path, low_memory=False)
+    purge = ~existing_df['symbol'].isin(universe)
+    drop = purge | existing_df['symbol'].isin(merged_df['symbol'].unique())
+    print(f"증분 병합: 기존 {existing_df.loc[~drop, 'symbol'].nunique()}개, 신규 {merged_df['symbol'].nunique()}개, "
+          f"제거 {existing_df.loc[purge, 'symbol'].nunique()}개 티커")
+    return pd.concat([existing_df[~drop], merged_df], ignore_index=True).reindex(columns=merged_df.columns)
+
 def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--incremental', action='store_true',
+                        help='merge only backfilled tickers into the existing financial_statements.csv and purge removed ones')
+    args = parser.parse_args()
+
     # 파일 경로 설정
     cash_flow_path = "/path/to/your/all_cash_flow_statements.csv"
     balance_sheet_path = "/path/to/your/all_balance_sheets.csv"
@@ -29,9 +52,11 @@ def main():
     merged_output_path = "/path/to/your/merged_financial_statements.csv"
     final_output_path = "/path/to/your/financial_statements.csv"
     shell_script_path = "/path/to/your/data-modeling.sh"
+    ticker_list_path = "/path/to/your/ticker-list.csv"
 
     # 제거할 열과 이동할 열 정의
-    columns_to_remove = ['link', 'is_recent_quarter', 'cik', 'fillingDate', 'acceptedDate']
+    # fillingDate는 historical-valuation.py의 시점 기준 주가 결합에 사용하므로 남겨둡니다
+    columns_to_remove = ['link', 'is_recent_quarter', 'cik', 'acceptedDate']
     columns_to_move = ['reportedCurrency', 'calendarYear', 'period']
 
     # CSV 파일 읽기
@@ -65,6 +90,10 @@ def main():
     columns_to_keep += ['SEC_filing']  # SEC_filing을 마지막에 추가
     merged_df = merged_df[columns_to_keep]
 
+    # 증분 실행이면 기존 결과와 합칩니다
+    if args.incremental:
+        merged_df = combine_with_existing(merged_df, final_output_path, set(load_tickers(ticker_list_path)))
+
     # 병합된 데이터프레임을 CSV로 저장
     merged_df.to_csv(merged_output_path, index=False)
     print(f"병합된 재무제표가 {merged_output_path}에 저장되었습니다.")
@@ -72,5 +101,8 @@ def main():
     # 파일 비교 및 처리
     compare_and_process_files(merged_output_path, final_output_path, shell_script_path)
 
+    # 병합까지 끝났으므로 유니버스 변경 내역을 반영 완료로 표시합니다 (받지 못한 티커는 다음 증분 실행에서 다시 받음)
+    commit_universe(ticker_list_path)
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    run_main('merge-financial-statements', main)
\ No newline at end of file
@@ -1,7 +1,11 @@
 #!/usr/bin/env python3
-import pandas as pd
+import argparse
 import numpy as np
+import pandas as pd
 import os
+from atomic_publish import publish_csv
+from chunked_io import iter_symbol_chunks, publish_csv_chunks, DEFAULT_MEMORY_BUDGET_MB
+from profiling import run_main, step
 
 def load_data(file_path):
     return pd.read_csv(file_path)
@@ -12,112 +16,188 @@ def preprocess_data(df):
     df['interestExpense'] = df['interestExpense'].abs()
     return df
 
-def calculate_eps(df):
-    df['EPS'] = df['netIncome'] / df['weightedAverageShsOut']
-    return df
+# 지표 레지스트리: 이름 -> (의존 필드/지표, 계산식, 반올림 자릿수)
+METRICS = {}
 
-def calculate_ffo(df):
-    df['FFO'] = df['netIncome'] + df['depreciationAndAmortization']
-    df['FFO_per_Share'] = df['FFO'] / df['weightedAverageShsOut']
-    return df
-
-def calculate_roic(df):
-    df['tax_rate'] = df['incomeTaxExpense'] / df['incomeBeforeTax']
-    df['nopat'] = df['operatingIncome'] * (1 - df['tax_rate']) * 4
-    df['invested_capital'] = df['totalDebt'] + df['totalStockholdersEquity']
-    df['ROIC'] = df['nopat'] / df['invested_capital']
-    return df
-
-def calculate_roe(df):
-    df['ROE'] = (df['netIncome'] * 4) / df['totalStockholdersEquity']
-    return df
+def register_metric(name, deps, func, digits=4):
+    METRICS[name] = (deps, func, digits)
 
 def calculate_cagr(start_value, end_value, years):
     return (end_value / start_value) ** (1/years) - 1
 
-def calculate_3year_cagr(series):
-    if len(series) < 12:
-        return None
-    start_value = series.iloc[-1]
-    end_value = series.iloc[0]
-    return calculate_cagr(start_value, end_value, 3)
-
-def calculate_1year_cagr(series):
-    if len(series) < 4:
-        return None
-    start_value = series.iloc[-1]
-    end_value = series.iloc[0]
-    return calculate_cagr(start_value, end_value, 1)
-
-def calculate_cagr_metrics(df):
-    df['Revenue_per_Share'] = df['revenue'] / df['weightedAverageShsOut']
-    df['CAGR-3-Years'] = df.groupby('symbol')['Revenue_per_Share'].rolling(window=12, min_periods=12).apply(calculate_3year_cagr, raw=False).reset_index(0, drop=True)
-    df['CAGR-3-Years'] = df.groupby('symbol')['CAGR-3-Years'].shift(-11)
-    df['CAGR-1-Year'] = df.groupby('symbol')['Revenue_per_Share'].rolling(window=4, min_periods=4).apply(calculate_1year_cagr, raw=False).reset_index(0, drop=True)
-    df['CAGR-1-Year'] = df.groupby('symbol')['CAGR-1-Year'].shift(-3)
-    return df
-
-def calculate_interest_coverage_ratio(df):
-    df['EBITDA'] = df['operatingIncome'] + df['depreciationAndAmortization']
-    df['Interest_Coverage_Ratio'] = np.where(df['interestExpense'] != 0,
-                                             df['EBITDA'] / df['interestExpense'],
-                                             None)
-    return df
-
-def calculate_additional_metrics(df):
-    df['Payout_Ratio'] = df['dividendsPaid'].abs() / df['netIncome'].abs()
-    df['Equity_per_Share'] = df['totalStockholdersEquity'] / df['weightedAverageShsOut']
-    df['Gross_Profit_per_Share'] = df['grossProfit'] / df['weightedAverageShsOut']
-    df['Interest_Expense_per_Share'] = df['interestExpense'] / df['weightedAverageShsOut']
-    df['Total_Expense_per_Share'] = (df['costOfRevenue'] + df['operatingExpenses']) / df['weightedAverageShsOut']
-    df['Operating_Expense_per_Share'] = df['operatingExpenses'] / df['weightedAverageShsOut']
-    df['Number_of_Shares_Outstanding'] = df['weightedAverageShsOut']
-    df['Invested_Capital_per_Share'] = df['invested_capital'] / df['weightedAverageShsOut']
-    df['Current_Asset_per_Share'] = df['totalCurrentAssets'] / df['weightedAverageShsOut']
-    df['Cash_and_Cash_Equivalent_per_Share'] = df['cashAndCashEquivalents'] / df['weightedAverageShsOut']
-    df['Total_Debt_per_Share'] = df['totalDebt'] / df['weightedAverageShsOut']
-    df['Current_Liabilities_per_Share'] = df['totalCurrentLiabilities'] / df['weightedAverageShsOut']
-    return df
-
-def round_columns(df):
-    columns_to_round = ['EPS', 'FFO_per_Share', 'ROIC', 'ROE', 'CAGR-3-Years', 'CAGR-1-Year',
-                        'Interest_Coverage_Ratio', 'Payout_Ratio', 'Equity_per_Share', 
-                        'Gross_Profit_per_Share', 'Interest_Expense_per_Share', 
-                        'Total_Expense_per_Share', 'Revenue_per_Share', 
-                        'Operating_Expense_per_Share', 'Invested_Capital_per_Share',
-                        'Current_Asset_per_Share', 'Cash_and_Cash_Equivalent_per_Share',
-                        'Total_Debt_per_Share', 'Current_Liabilities_per_Share']
-    df[columns_to_round] = df[columns_to_round].round(4)
-    return df
+def grouped_cagr(series, symbol, periods, years):
+    # 각 행(최신 분기)과 같은 심볼의 periods-1 행 뒤(과거 분기)를 비교합니다.
+    # 기존 rolling(window=periods).apply + shift와 같이 구간 내 값이 모두 있어야 계산합니다.
+    # 주식 수가 0인 분기의 inf 주당 값도 빠진 값으로 봅니다.
+    series = series.where(np.isfinite(series))
+    grouped = series.groupby(symbol)
+    start_value = grouped.shift(-(periods - 1))
+    complete = series.notna().astype(float).groupby(symbol).rolling(window=periods, min_periods=periods).sum()
+    complete = complete.reset_index(0, drop=True).groupby(symbol).shift(-(periods - 1)) == periods
+    complete = complete.reindex(series.index, fill_value=False)
+    return calculate_cagr(start_value, series, years).where(complete)
+
+def safe_divide(numerator, denominator):
+    return numerator / denominator.where(denominator != 0)
+
+def grouped_ttm_window(date, symbol):
+    # 각 행과 같은 심볼의 3행 뒤 분기가 약 9개월 전이면 연속된 4개 분기로 봅니다 (빠진 분기가 있으면 False)
+    dates = pd.to_datetime(date)
+    span = (dates - dates.groupby(symbol).shift(-3)).dt.days
+    return (span > 0) & (span <= 300)
+
+def grouped_ttm(series, symbol, window_ok):
+    # 최신 분기가 먼저 오는 정렬이므로 rolling 합을 3행 앞으로 당겨 각 행 + 이전 3개 분기의 합을 만듭니다
+    total = series.groupby(symbol).rolling(window=4, min_periods=4).sum().reset_index(0, drop=True)
+    total = total.groupby(symbol).shift(-3).reindex(series.index)
+    return total.where(window_ok)
+
+# 공통 중간값 (기본 출력에 포함되지 않음)
+register_metric('inv_shares', ['weightedAverageShsOut'], lambda shares: 1 / shares, digits=None)
+register_metric('tax_rate', ['incomeTaxExpense', 'incomeBeforeTax'],
+                lambda tax, pretax: tax / pretax, digits=None)
+register_metric('nopat', ['operatingIncome', 'tax_rate'],
+                lambda op_income, tax_rate: op_income * (1 - tax_rate) * 4, digits=None)
+register_metric('invested_capital', ['totalDebt', 'totalStockholdersEquity'],
+                lambda debt, equity: debt + equity, digits=None)
+register_metric('FFO', ['netIncome', 'depreciationAndAmortization'],
+                lambda net_income, da: net_income + da, digits=None)
+register_metric('EBITDA', ['operatingIncome', 'depreciationAndAmortization'],
+                lambda op_income, da: op_income + da, digits=None)
+
+# 지표
+register_metric('EPS', ['netIncome', 'inv_shares'], lambda net_income, inv: net_income * inv)
+register_metric('FFO_per_Share', ['FFO', 'inv_shares'], lambda ffo, inv: ffo * inv)
+register_metric('ROIC', ['nopat', 'invested_capital'], lambda nopat, capital: nopat / capital)
+register_metric('ROE', ['netIncome', 'totalStockholdersEquity'],
+                lambda net_income, equity: (net_income * 4) / equity)
+register_metric('Revenue_per_Share', ['revenue', 'inv_shares'], lambda revenue, inv: revenue * inv)
+register_metric('CAGR-3-Years', ['Revenue_per_Share', 'symbol'],
+                lambda rps, symbol: grouped_cagr(rps, symbol, 12, 3))
+register_metric('CAGR-1-Year', ['Revenue_per_Share', 'symbol'],
+                lambda rps, symbol: grouped_cagr(rps, symbol, 4, 1))
+# 예전에는 np.where 결과가 object 컬럼이라 반올림되지 않았지만, integrate-price-with-FS.py에서 어차피
+# 4자리로 반올림하므로 modeled_financial_statements.csv에서도 다른 지표처럼 4자리로 맞춥니다.
+register_metric('Interest_Coverage_Ratio', ['EBITDA', 'interestExpense'], safe_divide)
+register_metric('Payout_Ratio', ['dividendsPaid', 'netIncome'],
+                lambda dividends, net_income: dividends.abs() / net_income.abs())
+register_metric('Equity_per_Share', ['totalStockholdersEquity', 'inv_shares'], lambda x, inv: x * inv)
+register_metric('Gross_Profit_per_Share', ['grossProfit', 'inv_shares'], lambda x, inv: x * inv)
+register_metric('Interest_Expense_per_Share', ['interestExpense', 'inv_shares'], lambda x, inv: x * inv)
+register_metric('Total_Expense_per_Share', ['costOfRevenue', 'operatingExpenses', 'inv_shares'],
+                lambda cost, opex, inv: (cost + opex) * inv)
+register_metric('Operating_Expense_per_Share', ['operatingExpenses', 'inv_shares'], lambda x, inv: x * inv)
+register_metric('Number_of_Shares_Outstanding', ['weightedAverageShsOut'], lambda shares: shares, digits=None)
+register_metric('Invested_Capital_per_Share', ['invested_capital', 'inv_shares'], lambda x, inv: x * inv)
+register_metric('Current_Asset_per_Share', ['totalCurrentAssets', 'inv_shares'], lambda x, inv: x * inv)
+register_metric('Cash_and_Cash_Equivalent_per_Share', ['cashAndCashEquivalents', 'inv_shares'],
+                lambda x, inv: x * inv)
+register_metric('Total_Debt_per_Share', ['totalDebt', 'inv_shares'], lambda x, inv: x * inv)
+register_metric('Current_Liabilities_per_Share', ['totalCurrentLiabilities', 'inv_shares'],
+                lambda x, inv: x * inv)
+
+# 최근 4개 분기 합계(TTM) 기반 지표. 단일 분기 x 4 연환산 지표와 함께 출력됩니다.
+register_metric('ttm_window', ['date', 'symbol'], grouped_ttm_window, digits=None)
+for field in ['netIncome', 'operatingIncome', 'FFO', 'EBITDA', 'revenue', 'dividendsPaid',
+              'incomeTaxExpense', 'incomeBeforeTax']:
+    register_metric(f'{field}_TTM', [field, 'symbol', 'ttm_window'], grouped_ttm, digits=None)
+# 단일 분기 세율은 세전이익이 0에 가까운 분기에 크게 튀므로 TTM 지표는 4개 분기 합계로 세율을 구합니다
+register_metric('tax_rate_TTM', ['incomeTaxExpense_TTM', 'incomeBeforeTax_TTM'], safe_divide, digits=None)
+
+register_metric('EPS_TTM', ['netIncome_TTM', 'inv_shares'], lambda net_income, inv: net_income * inv)
+register_metric('FFO_per_Share_TTM', ['FFO_TTM', 'inv_shares'], lambda ffo, inv: ffo * inv)
+register_metric('Revenue_per_Share_TTM', ['revenue_TTM', 'inv_shares'], lambda revenue, inv: revenue * inv)
+register_metric('EBITDA_per_Share_TTM', ['EBITDA_TTM', 'inv_shares'], lambda ebitda, inv: ebitda * inv)
+register_metric('ROE_TTM', ['netIncome_TTM', 'totalStockholdersEquity'],
+                lambda net_income, equity: net_income / equity)
+register_metric('ROIC_TTM', ['operatingIncome_TTM', 'tax_rate_TTM', 'invested_capital'],
+                lambda op_income, tax_rate, capital: op_income * (1 - tax_rate) / capital)
+register_metric('Payout_Ratio_TTM', ['dividendsPaid_TTM', 'netIncome_TTM'],
+                lambda dividends, net_income: dividends.abs() / net_income.abs())
+
+ID_COLUMNS = ['symbol', 'date', 'calendarYear', 'period', 'SEC_filing']
+DEFAULT_OUTPUTS = ['EPS', 'FFO_per_Share', 'ROIC', 'ROE', 'CAGR-3-Years', 'CAGR-1-Year',
+                   'Interest_Coverage_Ratio', 'Payout_Ratio', 'Equity_per_Share',
+                   'Gross_Profit_per_Share', 'Interest_Expense_per_Share',
+                   'Total_Expense_per_Share', 'Revenue_per_Share',
+                   'Operating_Expense_per_Share', 'Number_of_Shares_Outstanding',
+                   'Invested_Capital_per_Share', 'Current_Asset_per_Share',
+                   'Cash_and_Cash_Equivalent_per_Share',
+                   'Total_Debt_per_Share', 'Current_Liabilities_per_Share',
+                   'EPS_TTM', 'FFO_per_Share_TTM', 'Revenue_per_Share_TTM', 'EBITDA_per_Share_TTM',
+                   'ROE_TTM', 'ROIC_TTM', 'Payout_Ratio_TTM']
+
+def build_plan(outputs):
+    """요청된 출력에 필요한 지표만 의존성 순서대로 나열합니다. 공통 중간값은 한 번만 포함됩니다."""
+    plan = []
+    visiting = set()
+
+    def visit(name):
+        if name in plan or name not in METRICS:
+            return
+        if name in visiting:
+            raise ValueError(f"Circular metric dependency: {name}")
+        visiting.add(name)
+        for dep in METRICS[name][0]:
+            visit(dep)
+        visiting.discard(name)
+        plan.append(name)
+
+    for name in outputs:
+        if name not in METRICS:
+            raise KeyError(f"Unknown metric: {name}")
+        visit(name)
+    return plan
+
+def evaluate_plan(df, plan, outputs):
+    """계획을 한 번에 평가합니다. 중간값은 df에 컬럼으로 추가하지 않고 평가 중에만 유지합니다."""
+    values = {}
+    for name in plan:
+        deps, func, _ = METRICS[name]
+        args = [values[dep] if dep in values else df[dep] for dep in deps]
+        with step(f"metric:{name}", rows=len(df)):
+            values[name] = func(*args)
+
+    results = {}
+    for name in outputs:
+        digits = METRICS[name][2]
+        series = values[name]
+        results[name] = series.round(digits) if digits is not None else series
+    return pd.DataFrame(results, index=df.index)
+
+def compute_metrics(df, outputs=None):
+    outputs = outputs or DEFAULT_OUTPUTS
+    plan = build_plan(outputs)
+    metrics = evaluate_plan(df, plan, outputs)
+    return pd.concat([df[ID_COLUMNS], metrics], axis=1)
 
 def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--chunked', action='store_true', help='process symbol-aligned chunks streamed from disk')
+    parser.add_argument('--memory-budget', type=int, default=DEFAULT_MEMORY_BUDGET_MB, help='memory budget in MB for --chunked')
+    args = parser.parse_args()
+
     current_dir = os.path.dirname(os.path.abspath(__file__))
     input_file = os.path.join(current_dir, 'financial_statements.csv')
     output_file = os.path.join(current_dir, 'modeled_financial_statements.csv')
 
-    df = load_data(input_file)
-    df = preprocess_data(df)
-    df = calculate_eps(df)
-    df = calculate_ffo(df)
-    df = calculate_roic(df)
-    df = calculate_roe(df)
-    df = calculate_cagr_metrics(df)
-    df = calculate_interest_coverage_ratio(df)
-    df = calculate_additional_metrics(df)
-    df = round_columns(df)
-
-    results = df[['symbol', 'date', 'calendarYear', 'period', 'SEC_filing',
-                  'EPS', 'FFO_per_Share', 'ROIC', 'ROE', 'CAGR-3-Years', 'CAGR-1-Year',
-                  'Interest_Coverage_Ratio', 'Payout_Ratio', 'Equity_per_Share', 
-                  'Gross_Profit_per_Share', 'Interest_Expense_per_Share', 
-                  'Total_Expense_per_Share', 'Revenue_per_Share', 
-                  'Operating_Expense_per_Share', 'Number_of_Shares_Outstanding',
-                  'Invested_Capital_per_Share', 'Current_Asset_per_Share',
-                  'Cash_and_Cash_Equivalent_per_Share',
-                  'Total_Debt_per_Share', 'Current_Liabilities_per_Share']]
+    if args.chunked:
+        chunks = (compute_metrics(preprocess_data(chunk))
+                  for chunk in iter_symbol_chunks(input_file, args.memory_budget))
+        rows = publish_csv_chunks(chunks, output_file)
+        print(f"{rows} rows saved to {output_file}")
+        return
+
+    with step('load') as record:
+        df = load_data(input_file)
+        record.rows = len(df)
+    with step('preprocess', rows=len(df)):
+        df = preprocess_data(df)
+    results = compute_metrics(df)
 
     print(results.head())
-    results.to_csv(output_file, index=False)
+    with step('publish', rows=len(results)):
+        publish_csv(results, output_file)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    run_main('modeling-FS', main)
\ No newline at end of file
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+import argparse
+import os
+import pandas as pd
+from atomic_publish import publish_csv
+from ticker_universe import load_ticker_table
+from profiling import run_main, step
+
+# 동종 업계 비교 대상 지표
+RANKED_METRICS = ['PER', 'PBR', 'PFFO', 'PER_TTM', 'PFFO_TTM', 'ROIC', 'ROE', 'ROIC_TTM', 'ROE_TTM',
+                  'CAGR-1-Year', 'CAGR-3-Years', 'CAGR-Longterm']
+# 주가 기반 지표 (FS_with_price.csv에서는 최신 분기에만 값이 있음)
+VALUATION_METRICS = ['PER', 'PBR', 'PFFO', 'PER_TTM', 'PFFO_TTM']
+PEER_LEVELS = ['Sector', 'Industry']
+
+def load_data(fs_file, ticker_list_file):
+    df = pd.read_csv(fs_file, low_memory=False)
+    ticker_df = pd.DataFrame(load_ticker_table(ticker_list_file))[['Ticker', 'Sector', 'Industry']]
+    df = df.merge(ticker_df.drop_duplicates('Ticker'), left_on='symbol', right_on='Ticker', how='left')
+    return df.drop('Ticker', axis=1)
+
+def attach_historical_valuation(df, valuation_file):
+    """과거 분기는 FS_with_price.csv에 주가가 없으므로, 모든 분기의 밸류에이션을
+    historical_valuation.csv의 공시일 종가 기준 값으로 바꿉니다."""
+    if not os.path.exists(valuation_file):
+        print(f"{valuation_file} not found; valuation metrics are ranked for the latest quarter only.")
+        return df
+    valuation = pd.read_csv(valuation_file, usecols=['symbol', 'date'] + VALUATION_METRICS)
+    df = df.drop(columns=[col for col in VALUATION_METRICS if col in df.columns])
+    return df.merge(valuation.drop_duplicates(['symbol', 'date']), on=['symbol', 'date'], how='left')
+
+def select_rows(df, all_quarters):
+    """기본은 심볼별 최신 분기(첫 행)만 사용합니다."""
+    if all_quarters:
+        return df
+    return df[df.groupby('symbol').cumcount() == 0]
+
+def rank_within_peers(df, metrics, all_quarters=False):
+    """섹터/산업 그룹 안에서 백분위, 중앙값, z-score를 한 번의 그룹 연산으로 계산합니다.
+    all_quarters이면 회계연도 말일이 회사마다 달라도 같은 달력 분기끼리 비교합니다."""
+    metrics = [m for m in metrics if m in df.columns]
+    values = df[metrics].apply(pd.to_numeric, errors='coerce')
+    result = df[['symbol', 'date'] + PEER_LEVELS].copy()
+    if all_quarters:
+        result['quarter'] = pd.to_datetime(df['date']).dt.to_period('Q')
+    frames = [result]
+
+    for level in PEER_LEVELS:
+        keys = [df[level], result['quarter']] if all_quarters else [df[level]]
+        grouped = values.groupby(keys, dropna=True)
+
+        pct = grouped.rank(pct=True)
+        median = grouped.transform('median')
+        mean = grouped.transform('mean')
+        std = grouped.transform('std')
+        zscore = (values - mean) / std.where(std != 0)
+
+        prefix = level.lower()
+        frames.append(pct.round(4).add_suffix(f'_{prefix}_pct'))
+        frames.append(median.round(4).add_suffix(f'_{prefix}_median'))
+        frames.append(zscore.round(4).add_suffix(f'_{prefix}_z'))
+
+    return pd.concat(frames, axis=1)
+
+def main():
+    parser = argparse.ArgumentParser(description='Sector- and industry-relative ranking of valuation and quality metrics')
+    parser.add_argument('--all-quarters', action='store_true', help='rank every quarter against peers of the same calendar quarter')
+    args = parser.parse_args()
+
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    fs_file = os.path.join(script_dir, 'FS_with_price.csv')
+    ticker_list_file = os.path.join(script_dir, 'ticker-list.csv')
+    valuation_file = os.path.join(script_dir, 'historical_valuation.csv')
+    output_file = os.path.join(script_dir, 'peer_rankings.csv')
+
+    with step('load') as record:
+        df = load_data(fs_file, ticker_list_file)
+        record.rows = len(df)
+    if args.all_quarters:
+        with step('attach_historical_valuation', rows=len(df)):
+            df = attach_historical_valuation(df, valuation_file)
+    df = select_rows(df, args.all_quarters).reset_index(drop=True)
+    with step('rank_within_peers', rows=len(df)):
+        rankings = rank_within_peers(df, RANKED_METRICS, args.all_quarters)
+
+    with step('publish', rows=len(rankings)):
+        publish_csv(rankings, output_file)
+    print(f"Peer rankings for {rankings['symbol'].nunique()} symbols saved to {output_file}")
+
+if __name__ == "__main__":
+    run_main('peer-ranking', main)
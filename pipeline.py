@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+import argparse
+import builtins
+import os
+import runpy
+import sys
+import time
+import traceback
+
+import profiling
+
+# 하나의 인터프리터에서 여러 단계를 실행하는 통합 진입점
+#   python pipeline.py list
+#   python pipeline.py run fetch-stock-prices integrate-price-with-FS final-processing
+#   python pipeline.py import-report final-processing
+#   python pipeline.py final-processing [args...]
+#   python pipeline.py --profile[=cpu|mem] run modeling-FS final-processing   (보고서는 profiles/ 아래, profiling.py 참고)
+# 각 단계 스크립트는 필요한 모듈을 스스로 import 하므로, 여기서는 pandas나 클라우드 라이브러리를 미리 불러오지 않습니다.
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+
+STAGES = {
+    'fetch-ticker-list': 'fetch-ticker-list.py',
+    'fetch-IS': 'fetch-IS.py',
+    'fetch-BS': 'fetch-BS.py',
+    'fetch-CS': 'fetch-CS.py',
+    'merge-financial-statements': 'merge-financial-statements.py',
+    'modeling-FS': 'modeling_FS.py',
+    'historical-valuation': 'historical-valuation.py',
+    'fetch-stock-prices': 'fetch-stock-prices.py',
+    'fetch-dividend-data': 'fetch-dividend-data.py',
+    'fetch-ema-data': 'fetch-ema-data.py',
+    'integrate-price-with-FS': 'integrate-price-with-FS.py',
+    'integrate-ema-with-FS': 'integrate-ema-with-FS.py',
+    'final-processing': 'final-processing.py ',
+    'peer-ranking': 'peer-ranking.py',
+    'snapshot': 'snapshot_store.py',
+    'upload-FS-to-GCS': 'upload_FS_to_GCS.py',
+    'price-refresh-daemon': 'price-refresh-daemon.py',
+}
+
+class ImportTimer:
+    """단계 실행 중 최상위 import 별 소요 시간을 기록합니다 (중첩 import 시간은 바깥 모듈에 포함)."""
+
+    def __init__(self):
+        self.timings = {}
+        self.depth = 0
+        self.original_import = None
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        if self.depth > 0 or level != 0 or name in sys.modules:
+            self.depth += 1
+            try:
+                return self.original_import(name, globals, locals, fromlist, level)
+            finally:
+                self.depth -= 1
+        self.depth += 1
+        start = time.perf_counter()
+        try:
+            return self.original_import(name, globals, locals, fromlist, level)
+        finally:
+            self.timings[name] = self.timings.get(name, 0) + time.perf_counter() - start
+            self.depth -= 1
+
+    def __enter__(self):
+        self.original_import = builtins.__import__
+        builtins.__import__ = self._import
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        builtins.__import__ = self.original_import
+
+def run_stage(name, args=(), profile=None):
+    """단계 스크립트를 현재 인터프리터에서 __main__으로 실행합니다. 성공하면 True를 반환합니다.
+    profile에 모드('cpu' 또는 'mem')를 주면 단계 실행을 프로파일링해 profiles/ 아래에 보고서를 남깁니다."""
+    path = os.path.join(current_dir, STAGES[name])
+    saved_argv = sys.argv
+    sys.argv = [path] + list(args)
+    start = time.perf_counter()
+    try:
+        if profile:
+            with profiling.profile(name, profile):
+                runpy.run_path(path, run_name='__main__')
+        else:
+            runpy.run_path(path, run_name='__main__')
+        ok = True
+    except SystemExit as e:
+        ok = e.code in (None, 0)
+    except Exception as e:
+        print(f"[pipeline] An error occurred in {name}: {e}")
+        traceback.print_exc()
+        ok = False
+    finally:
+        sys.argv = saved_argv
+    print(f"[pipeline] {name} finished in {time.perf_counter() - start:.2f}s")
+    return ok
+
+def run_sequence(names, profile=None):
+    start = time.perf_counter()
+    for name in names:
+        if not run_stage(name, profile=profile):
+            print(f"[pipeline] {name} failed, stopping")
+            return False
+    print(f"[pipeline] {len(names)} stages finished in {time.perf_counter() - start:.2f}s")
+    return True
+
+def import_report(name, args=(), top=20):
+    with ImportTimer() as timer:
+        ok = run_stage(name, args)
+    print(f"\n[pipeline] import time for {name}")
+    for module, seconds in sorted(timer.timings.items(), key=lambda item: item[1], reverse=True)[:top]:
+        print(f"  {seconds * 1000:9.1f} ms  {module}")
+    print(f"  {sum(timer.timings.values()) * 1000:9.1f} ms  total")
+    return ok
+
+def split_profile_flag(argv):
+    """맨 앞의 --profile 또는 --profile=<mode>를 떼어 (모드, 나머지 인자)를 반환합니다.
+    단계 인자와 섞이지 않도록 argparse 대신 직접 처리합니다."""
+    mode = profiling.profile_mode(argv[0]) if argv else None
+    if mode is None:
+        return None, argv
+    return mode, argv[1:]
+
+def main():
+    profile, argv = split_profile_flag(sys.argv[1:])
+    if argv and argv[0] in STAGES:
+        sys.exit(0 if run_stage(argv[0], argv[1:], profile) else 1)
+
+    parser = argparse.ArgumentParser(description='Run pipeline stages inside one interpreter',
+                                     epilog='Prefix any command with --profile[=cpu|mem] to write profiling reports.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('list')
+    run_parser = subparsers.add_parser('run')
+    run_parser.add_argument('stages', nargs='+', choices=list(STAGES))
+    report_parser = subparsers.add_parser('import-report')
+    report_parser.add_argument('stage', choices=list(STAGES))
+    report_parser.add_argument('--top', type=int, default=20)
+    args = parser.parse_args(argv)
+
+    if args.command == 'list':
+        for name, script in STAGES.items():
+            print(f"{name:28} {script.strip()}")
+        return
+    if args.command == 'run':
+        ok = run_sequence(args.stages, profile)
+    else:
+        ok = import_report(args.stage, top=args.top)
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+import argparse
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from atomic_publish import publish_csv, released_version
+from fmp_client import default_policy, CircuitOpenError
+from profiling import run_main
+
+API_KEY = os.environ.get("FINANCIAL_MODELING_PREP_API_KEY")
+PRICE_URL = "https://financialmodelingprep.com/api/v3/stock/full/real-time-price?apikey={api_key}"
+
+# 주가에 따라 바뀌는 컬럼과 계산에 필요한 펀더멘털 컬럼
+PRICE_COLUMNS = ['price', 'PBR', 'PER', 'PFFO', 'PER_TTM', 'PFFO_TTM', 'Dividend_Yield']
+FUNDAMENTAL_COLUMNS = ['Equity_per_Share', 'EPS', 'FFO_per_Share', 'EPS_TTM', 'FFO_per_Share_TTM',
+                       'Annual_Dividend']
+
+def get_jsonparsed_data(url):
+    # Retries, backoff and the circuit breaker are handled by the shared request policy
+    return default_policy.get_json(url)
+
+def fetch_prices(symbols):
+    data = get_jsonparsed_data(PRICE_URL.format(api_key=API_KEY))
+    prices = {item['symbol']: item['lastSalePrice'] for item in data if item['symbol'] in symbols}
+    return pd.Series(prices, dtype=float)
+
+def ratio(price, denominator):
+    return (price / denominator.where(denominator != 0)).round(4)
+
+def compute_price_columns(fundamentals, prices):
+    """integrate-price-with-FS.py와 final-processing.py와 같은 방식으로 주가 의존 컬럼만 계산합니다."""
+    result = pd.DataFrame(index=prices.index)
+    result['price'] = prices
+    result['PBR'] = ratio(prices, fundamentals['Equity_per_Share'])
+    # final-processing.py와 같이 PER, PFFO는 4로 나눕니다
+    result['PER'] = ratio(prices, fundamentals['EPS']) / 4
+    result['PFFO'] = ratio(prices, fundamentals['FFO_per_Share']) / 4
+    result['PER_TTM'] = ratio(prices, fundamentals['EPS_TTM'])
+    result['PFFO_TTM'] = ratio(prices, fundamentals['FFO_per_Share_TTM'])
+    result['Dividend_Yield'] = fundamentals['Annual_Dividend'] / prices.replace(0, np.nan)
+    return result.replace([np.inf, -np.inf], np.nan)
+
+class PriceRefresher:
+    """모델링된 재무제표를 메모리에 두고 주가가 바뀐 심볼의 주가 의존 컬럼만 다시 계산합니다.
+    배치 파이프라인의 FS_with_price.csv는 읽기만 하고, 실시간 결과는 live_file과 delta_file에 씁니다.
+    delta_file은 마지막 전체 스냅샷 이후 바뀐 심볼별 최신 값이며, 두 파일 모두 원자적으로 교체합니다.
+    integrate-price/integrate-ema 단계의 중간 결과를 읽지 않도록 final-processing.py가 완성본으로
+    표시한 버전(mark_release)만 불러옵니다."""
+
+    def __init__(self, fs_file, live_file, delta_file):
+        self.fs_file = fs_file
+        self.live_file = live_file
+        self.delta_file = delta_file
+        self.version = None
+        self.delta = pd.DataFrame(columns=['symbol'] + PRICE_COLUMNS + ['updated_at'])
+        self.load()
+
+    def load(self):
+        version = released_version(self.fs_file)
+        if version is None:
+            raise FileNotFoundError(f"No finished version of {self.fs_file}; run final-processing first")
+        self.df = pd.read_csv(version, low_memory=False)
+        for col in PRICE_COLUMNS + FUNDAMENTAL_COLUMNS:
+            if col not in self.df.columns:
+                self.df[col] = np.nan
+        # 심볼별 첫 행(최신 분기)에만 주가 관련 값이 들어갑니다
+        first_rows = self.df.groupby('symbol').head(1)
+        self.row_index = pd.Series(first_rows.index, index=first_rows['symbol'])
+        self.fundamentals = first_rows.set_index('symbol')[FUNDAMENTAL_COLUMNS].apply(pd.to_numeric, errors='coerce')
+        self.prices = pd.to_numeric(first_rows.set_index('symbol')['price'], errors='coerce')
+        self.version = version
+        # 새 완성본의 펀더멘털이 다음 스냅샷에 반영되도록 합니다
+        self.dirty = True
+        print(f"Loaded fundamentals for {len(self.row_index)} symbols from {version}")
+
+    def reload_if_changed(self):
+        # 배치 파이프라인이 새 완성본을 표시한 경우에만 다시 읽습니다
+        if released_version(self.fs_file) != self.version:
+            self.load()
+
+    def refresh(self, new_prices):
+        new_prices = new_prices.reindex(self.prices.index).dropna()
+        current = self.prices.reindex(new_prices.index)
+        moved = new_prices[current.isna() | (new_prices != current)]
+        if moved.empty:
+            return 0
+
+        updated = compute_price_columns(self.fundamentals.loc[moved.index], moved)
+        self.prices.loc[moved.index] = moved
+        rows = self.row_index.loc[moved.index].to_numpy()
+        self.df.loc[rows, PRICE_COLUMNS] = updated[PRICE_COLUMNS].to_numpy()
+        self.dirty = True
+
+        delta = updated.rename_axis('symbol').reset_index()
+        delta['updated_at'] = datetime.now().isoformat(timespec='seconds')
+        # 심볼마다 가장 최근 값만 남겨 델타 파일 크기를 심볼 수 이하로 유지합니다
+        previous = self.delta[~self.delta['symbol'].isin(delta['symbol'])]
+        self.delta = pd.concat([previous, delta], ignore_index=True) if not previous.empty else delta
+        publish_csv(self.delta, self.delta_file)
+        return len(moved)
+
+    def write_snapshot(self):
+        if not self.dirty:
+            return
+        publish_csv(self.df, self.live_file)
+        self.dirty = False
+        # 전체 스냅샷에 반영된 변경분은 델타 파일에서 비웁니다
+        self.delta = self.delta.iloc[0:0]
+        publish_csv(self.delta, self.delta_file)
+        print(f"Full snapshot written to {self.live_file}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Resident price-refresh service publishing FS_with_price_live.csv')
+    parser.add_argument('--interval', type=float, default=15, help='seconds between price polls')
+    parser.add_argument('--snapshot-interval', type=float, default=600, help='seconds between full snapshots')
+    args = parser.parse_args()
+
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    fs_file = os.path.join(current_dir, 'FS_with_price.csv')
+    live_file = os.path.join(current_dir, 'FS_with_price_live.csv')
+    delta_file = os.path.join(current_dir, 'FS_price_delta.csv')
+
+    refresher = PriceRefresher(fs_file, live_file, delta_file)
+    last_snapshot = time.time()
+
+    try:
+        while True:
+            started = time.time()
+            delay = args.interval
+            try:
+                refresher.reload_if_changed()
+                changed = refresher.refresh(fetch_prices(set(refresher.row_index.index)))
+                if changed:
+                    print(f"{datetime.now():%H:%M:%S} Updated {changed} symbols")
+            except CircuitOpenError as e:
+                # 브레이커가 반열림 상태가 될 때까지 기다렸다가 다시 폴링합니다
+                print(f"Price endpoint unavailable, backing off {default_policy.cooldown:.0f}s: {e}")
+                delay = default_policy.cooldown
+            except Exception as e:
+                print(f"An error occurred while refreshing prices: {e}")
+
+            if time.time() - last_snapshot >= args.snapshot_interval:
+                refresher.write_snapshot()
+                last_snapshot = time.time()
+
+            time.sleep(max(0, delay - (time.time() - started)))
+    except KeyboardInterrupt:
+        refresher.write_snapshot()
+        print("Price refresh service stopped.")
+
+if __name__ == "__main__":
+    run_main('price-refresh-daemon', main)
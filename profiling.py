@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+import cProfile
+import csv
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+
+# 프로파일링 모드
+#   python <stage>.py [args...] --profile[=cpu|mem]        (각 단계 스크립트는 run_main()으로 실행됩니다)
+#   python pipeline.py --profile[=cpu|mem] <stage> [args...]
+#   python pipeline.py --profile[=cpu|mem] run <stage> <stage> ...
+#   셸 스크립트는 PROFILE=1|cpu|mem 환경 변수로 켭니다
+# tracemalloc은 할당마다 훅이 걸려 pandas 단계를 몇 배 느리게 만들기 때문에, 시간 측정(cpu)과
+# 메모리 측정(mem)을 따로 실행합니다. profiles/<stage>-<mode>-<timestamp>/ 에 다음 파일을 남깁니다.
+#   cpu 모드
+#     cpu.prof         cProfile 결과 (pstats/snakeviz 등으로 열 수 있음)
+#     cpu_top.txt      누적 시간 기준 상위 함수
+#     stacks.folded    샘플링한 콜스택 (flamegraph.pl, speedscope 호환 folded 형식)
+#     steps.csv        이름 붙은 단계별 호출 수, 시간, 처리 행 수, 초당 행 수
+#   mem 모드
+#     memory_top.txt   메모리 사용이 가장 컸던 단계 종료 시점의 tracemalloc 할당 상위 라인
+#     steps.csv        이름 붙은 단계별 호출 수, 처리 행 수, 남은/최대 할당 바이트
+# 프로파일링이 꺼져 있으면 step()은 아무 일도 하지 않습니다.
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_PROFILE_DIR = os.path.join(current_dir, 'profiles')
+SAMPLE_INTERVAL = 0.005
+MODES = ('cpu', 'mem')
+
+_active = None
+
+class StackSampler:
+    """별도 스레드에서 대상 스레드의 콜스택을 주기적으로 샘플링해 folded 형식으로 모읍니다."""
+
+    def __init__(self, thread_id, interval=SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if names:
+                self.stacks[';'.join(reversed(names))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def write(self, path):
+        with open(path, 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+class Profiler:
+    def __init__(self, name, mode='cpu', output_dir=DEFAULT_PROFILE_DIR):
+        if mode not in MODES:
+            raise ValueError(f"Unknown profile mode: {mode}")
+        stamp = datetime.now().strftime('%Y%m%dT%H%M%S')
+        self.mode = mode
+        self.output_dir = os.path.join(output_dir, f"{name}-{mode}-{stamp}")
+        self.steps = {}
+        self.high_water = 0
+        self.snapshot = None
+        self.cpu = cProfile.Profile() if mode == 'cpu' else None
+        self.sampler = StackSampler(threading.get_ident()) if mode == 'cpu' else None
+
+    def start(self):
+        if self.mode == 'mem':
+            tracemalloc.start()
+        else:
+            self.sampler.start()
+            self.cpu.enable()
+
+    def stop(self):
+        if self.mode == 'mem':
+            if self.snapshot is None:
+                self.snapshot = ('end', tracemalloc.take_snapshot())
+            tracemalloc.stop()
+        else:
+            self.cpu.disable()
+            self.sampler.stop()
+        self.write_reports()
+
+    def record(self, name, rows, seconds=0.0, retained=0, peak=0):
+        entry = self.steps.setdefault(name, {'calls': 0, 'seconds': 0.0, 'rows': 0, 'retained_bytes': 0,
+                                             'peak_bytes': 0})
+        entry['calls'] += 1
+        entry['seconds'] += seconds
+        entry['rows'] += rows or 0
+        entry['retained_bytes'] += retained
+        entry['peak_bytes'] = max(entry['peak_bytes'], peak)
+
+    def maybe_snapshot(self, name, current):
+        # 단계가 끝난 시점의 사용량이 지금까지 중 가장 크면 그 시점의 할당을 보관합니다
+        if current > self.high_water:
+            self.high_water = current
+            self.snapshot = (name, tracemalloc.take_snapshot())
+
+    def write_steps(self, path):
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            if self.mode == 'cpu':
+                writer.writerow(['step', 'calls', 'seconds', 'rows', 'rows_per_second'])
+                for name, s in sorted(self.steps.items(), key=lambda item: item[1]['seconds'], reverse=True):
+                    rate = round(s['rows'] / s['seconds'], 1) if s['seconds'] > 0 and s['rows'] else ''
+                    writer.writerow([name, s['calls'], round(s['seconds'], 6), s['rows'], rate])
+            else:
+                writer.writerow(['step', 'calls', 'rows', 'retained_bytes', 'peak_bytes'])
+                for name, s in sorted(self.steps.items(), key=lambda item: item[1]['peak_bytes'], reverse=True):
+                    writer.writerow([name, s['calls'], s['rows'], s['retained_bytes'], s['peak_bytes']])
+
+    def write_reports(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.write_steps(os.path.join(self.output_dir, 'steps.csv'))
+
+        if self.mode == 'cpu':
+            self.cpu.dump_stats(os.path.join(self.output_dir, 'cpu.prof'))
+            buffer = io.StringIO()
+            pstats.Stats(self.cpu, stream=buffer).sort_stats('cumulative').print_stats(50)
+            with open(os.path.join(self.output_dir, 'cpu_top.txt'), 'w') as f:
+                f.write(buffer.getvalue())
+            self.sampler.write(os.path.join(self.output_dir, 'stacks.folded'))
+        else:
+            step_name, snapshot = self.snapshot
+            snapshot = snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__),
+                                               tracemalloc.Filter(False, __file__)])
+            with open(os.path.join(self.output_dir, 'memory_top.txt'), 'w') as f:
+                f.write(f"# after step: {step_name}, traced: {self.high_water} bytes\n")
+                for stat in snapshot.statistics('lineno')[:50]:
+                    f.write(f"{stat}\n")
+
+        print(f"[profile] Reports written to {self.output_dir}")
+
+@contextmanager
+def profile(name, mode='cpu', output_dir=DEFAULT_PROFILE_DIR):
+    """블록 전체를 프로파일링하고 보고서를 씁니다. 블록 안의 step() 호출이 단계별로 기록됩니다."""
+    global _active
+    profiler = Profiler(name, mode, output_dir)
+    _active = profiler
+    profiler.start()
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
+        _active = None
+
+def profile_mode(arg):
+    """인자가 --profile 또는 --profile=<mode>면 모드를, 아니면 None을 반환합니다."""
+    flag, _, mode = arg.partition('=')
+    if flag != '--profile':
+        return None
+    mode = mode or 'cpu'
+    if mode not in MODES:
+        sys.exit(f"Usage: --profile[={'|'.join(MODES)}]")
+    return mode
+
+def run_main(name, main):
+    """단계 스크립트의 main()을 실행합니다. 명령줄의 --profile[=cpu|mem]은 단계 인자 파싱 전에 떼어 내고,
+    주어졌으면 실행 전체를 프로파일링합니다. pipeline.py가 이미 프로파일링 중이면 그대로 실행합니다."""
+    mode = None
+    args = []
+    for arg in sys.argv[1:]:
+        arg_mode = profile_mode(arg)
+        if arg_mode is None:
+            args.append(arg)
+        else:
+            mode = arg_mode
+    sys.argv[1:] = args
+    if mode is None or _active is not None:
+        return main()
+    with profile(name, mode):
+        return main()
+
+class StepRecord:
+    """step() 블록 안에서 처리 행 수를 나중에 알게 되면 rows를 채워 넣습니다."""
+    __slots__ = ('rows',)
+
+    def __init__(self, rows=None):
+        self.rows = rows
+
+@contextmanager
+def step(name, rows=None):
+    """이름 붙은 단계의 처리 행 수와, cpu 모드에서는 시간을, mem 모드에서는 할당 바이트를 기록합니다.
+    프로파일링 중이 아니면 아무 일도 하지 않습니다.
+    tracemalloc의 peak는 전역이라 step이 중첩되면 바깥 step의 peak_bytes는 근사값입니다."""
+    record = StepRecord(rows)
+    profiler = _active
+    if profiler is None:
+        yield record
+        return
+    if profiler.mode == 'cpu':
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            profiler.record(name, record.rows, seconds=time.perf_counter() - start)
+        return
+    before, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    try:
+        yield record
+    finally:
+        after, peak = tracemalloc.get_traced_memory()
+        profiler.record(name, record.rows, retained=after - before, peak=max(0, peak - before))
+        profiler.maybe_snapshot(name, after)
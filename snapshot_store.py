@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+import argparse
+import csv
+import gzip
+import hashlib
+import io
+import json
+import os
+from datetime import datetime
+from profiling import run_main
+
+# 스냅샷 저장소 구조
+#   snapshots/objects/ab/cdef...   심볼별 청크 (sha256 주소, gzip 압축, 중복 제거)
+#   snapshots/manifests/<run_id>.json   실행마다 기록되는 작은 매니페스트
+# 매 실행 바뀌는 심볼별 최신 분기 행(주가, PER 등)은 실행마다 하나의 객체로 모아 저장하고,
+# 새 분기가 공시될 때만 바뀌는 과거 분기 행은 심볼별 객체로 저장해 대부분의 실행에서 재사용합니다.
+# 매니페스트: latest = 최신 행 묶음 주소(chunks 순서), chunks = [symbol, 과거 행 주소(없으면 null)]
+# latest가 없는 예전 매니페스트의 chunks 항목은 [symbol, 심볼 전체 행 주소...] 입니다.
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_STORE_DIR = os.path.join(current_dir, 'snapshots')
+DEFAULT_SOURCE_FILE = os.path.join(current_dir, 'FS_with_price.csv')
+
+def object_path(store_dir, digest):
+    return os.path.join(store_dir, 'objects', digest[:2], digest[2:])
+
+def manifest_path(store_dir, run_id):
+    return os.path.join(store_dir, 'manifests', f"{run_id}.json")
+
+def put_object(store_dir, data):
+    """청크를 저장하고 주소(sha256)를 반환합니다. 이미 있는 청크는 다시 쓰지 않습니다."""
+    digest = hashlib.sha256(data).hexdigest()
+    path = object_path(store_dir, digest)
+    if os.path.exists(path):
+        return digest, False
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(gzip.compress(data))
+    os.replace(tmp_path, path)
+    return digest, True
+
+def get_object(store_dir, digest):
+    with open(object_path(store_dir, digest), 'rb') as f:
+        return gzip.decompress(f.read())
+
+def iter_symbol_chunks(file_path):
+    """CSV를 헤더와 (symbol, 원본 행 목록) 청크로 나눕니다. 같은 심볼이 연속된 행이 한 청크가 됩니다."""
+    with open(file_path, 'rb') as f:
+        header = f.readline()
+        columns = next(csv.reader([header.decode('utf-8')]))
+        symbol_index = columns.index('symbol')
+        yield header
+
+        current_symbol = None
+        lines = []
+        for line in f:
+            if symbol_index == 0:
+                symbol = line.split(b',', 1)[0].decode('utf-8')
+            else:
+                symbol = next(csv.reader([line.decode('utf-8')]))[symbol_index]
+            if symbol != current_symbol and lines:
+                yield current_symbol, lines
+                lines = []
+            current_symbol = symbol
+            lines.append(line)
+        if lines:
+            yield current_symbol, lines
+
+def write_manifest(store_dir, manifest):
+    path = manifest_path(store_dir, manifest['run_id'])
+    if os.path.exists(path):
+        raise FileExistsError(f"Snapshot {manifest['run_id']} already exists")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, path)
+
+def create_snapshot(file_path, store_dir=DEFAULT_STORE_DIR, run_id=None):
+    """출력 파일을 최신 행 묶음 하나와 심볼별 과거 행 청크로 저장하고 매니페스트를 기록합니다."""
+    run_id = run_id or datetime.now().strftime('%Y%m%dT%H%M%S_%f')
+    chunks = iter_symbol_chunks(file_path)
+    header = next(chunks)
+    header_digest, _ = put_object(store_dir, header)
+
+    entries = []
+    latest_rows = []
+    new_objects = 0
+    new_bytes = 0
+    for symbol, lines in chunks:
+        latest_rows.append(lines[0])
+        history = b''.join(lines[1:])
+        digest = None
+        if history:
+            digest, created = put_object(store_dir, history)
+            if created:
+                new_objects += 1
+                new_bytes += len(history)
+        entries.append([symbol, digest])
+
+    latest = b''.join(latest_rows)
+    latest_digest, created = put_object(store_dir, latest)
+    if created:
+        new_objects += 1
+        new_bytes += len(latest)
+
+    write_manifest(store_dir, {
+        'run_id': run_id,
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'source': os.path.basename(file_path),
+        'header': header_digest,
+        'latest': latest_digest,
+        'chunks': entries,
+    })
+
+    print(f"Snapshot {run_id}: {len(entries)} chunks, {new_objects} new ({new_bytes} bytes)")
+    return run_id
+
+def load_manifest(store_dir, run_id):
+    with open(manifest_path(store_dir, run_id), 'r') as f:
+        return json.load(f)
+
+def list_snapshots(store_dir=DEFAULT_STORE_DIR):
+    manifest_dir = os.path.join(store_dir, 'manifests')
+    if not os.path.isdir(manifest_dir):
+        return []
+    return sorted(name[:-len('.json')] for name in os.listdir(manifest_dir) if name.endswith('.json'))
+
+def iter_manifest_symbols(store_dir, manifest):
+    """매니페스트의 심볼마다 (symbol, 최신 행 bytes 또는 None, 나머지 행 객체 주소 목록)을 돌려줍니다."""
+    if 'latest' not in manifest:
+        for symbol, *digests in manifest['chunks']:
+            yield symbol, None, [digest for digest in digests if digest]
+        return
+    latest_rows = io.BytesIO(get_object(store_dir, manifest['latest'])).readlines()
+    for (symbol, digest), latest in zip(manifest['chunks'], latest_rows):
+        yield symbol, latest, [digest] if digest else []
+
+def restore_snapshot(run_id, output_path, store_dir=DEFAULT_STORE_DIR, symbols=None):
+    """매니페스트로 과거 출력 파일을 복원합니다. symbols를 주면 해당 심볼만 복원합니다."""
+    manifest = load_manifest(store_dir, run_id)
+    with open(output_path, 'wb') as f:
+        f.write(get_object(store_dir, manifest['header']))
+        for symbol, latest, digests in iter_manifest_symbols(store_dir, manifest):
+            if symbols is None or symbol in symbols:
+                if latest is not None:
+                    f.write(latest)
+                for digest in digests:
+                    f.write(get_object(store_dir, digest))
+    print(f"Snapshot {run_id} restored to {output_path}")
+
+def diff_snapshots(old_run_id, new_run_id, store_dir=DEFAULT_STORE_DIR):
+    """두 실행 사이에 추가/삭제/변경된 심볼을 청크 주소만 비교해 반환합니다.
+    history_changed는 최신 분기 행이 아닌 과거 분기 행까지 바뀐 심볼입니다."""
+    old = load_manifest(store_dir, old_run_id)
+    new = load_manifest(store_dir, new_run_id)
+    old_chunks = {}
+    for symbol, latest, digests in iter_manifest_symbols(store_dir, old):
+        old_chunks.setdefault(symbol, []).append((latest, digests))
+    new_chunks = {}
+    for symbol, latest, digests in iter_manifest_symbols(store_dir, new):
+        new_chunks.setdefault(symbol, []).append((latest, digests))
+
+    common = old_chunks.keys() & new_chunks.keys()
+    return {
+        'header_changed': old['header'] != new['header'],
+        'added': sorted(new_chunks.keys() - old_chunks.keys()),
+        'removed': sorted(old_chunks.keys() - new_chunks.keys()),
+        'changed': sorted(s for s in common if old_chunks[s] != new_chunks[s]),
+        'history_changed': sorted(s for s in common
+                                  if [d for _, d in old_chunks[s]] != [d for _, d in new_chunks[s]]),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Content-addressed snapshots of the published dataset')
+    parser.add_argument('--store', default=DEFAULT_STORE_DIR)
+    subparsers = parser.add_subparsers(dest='command')
+
+    snapshot_parser = subparsers.add_parser('snapshot')
+    snapshot_parser.add_argument('file', nargs='?', default=DEFAULT_SOURCE_FILE)
+    snapshot_parser.add_argument('--run-id')
+
+    subparsers.add_parser('list')
+
+    restore_parser = subparsers.add_parser('restore')
+    restore_parser.add_argument('run_id')
+    restore_parser.add_argument('output')
+    restore_parser.add_argument('--symbols', nargs='+')
+
+    diff_parser = subparsers.add_parser('diff')
+    diff_parser.add_argument('old_run_id')
+    diff_parser.add_argument('new_run_id')
+
+    args = parser.parse_args()
+
+    # 인자 없이 실행하면 FS_with_price.csv 스냅샷을 만듭니다 (파이프라인 기본 동작)
+    if args.command in (None, 'snapshot'):
+        create_snapshot(getattr(args, 'file', DEFAULT_SOURCE_FILE), args.store, getattr(args, 'run_id', None))
+    elif args.command == 'list':
+        for run_id in list_snapshots(args.store):
+            print(run_id)
+    elif args.command == 'restore':
+        restore_snapshot(args.run_id, args.output, args.store, set(args.symbols) if args.symbols else None)
+    elif args.command == 'diff':
+        result = diff_snapshots(args.old_run_id, args.new_run_id, args.store)
+        print(f"Header changed: {result['header_changed']}")
+        for key in ('added', 'removed', 'changed', 'history_changed'):
+            print(f"{key.replace('_', ' ').capitalize()} ({len(result[key])}): {', '.join(result[key])}")
+
+if __name__ == "__main__":
+    run_main('snapshot', main)
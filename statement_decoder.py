@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+import csv
+import json
+
+# FMP v3 분기 재무제표 필드 (API 응답 순서, 'link' 제외)
+COMMON_FIELDS = ['date', 'symbol', 'reportedCurrency', 'cik', 'fillingDate', 'acceptedDate',
+                 'calendarYear', 'period']
+
+INCOME_STATEMENT_FIELDS = COMMON_FIELDS + [
+    'revenue', 'costOfRevenue', 'grossProfit', 'grossProfitRatio',
+    'researchAndDevelopmentExpenses', 'generalAndAdministrativeExpenses',
+    'sellingAndMarketingExpenses', 'sellingGeneralAndAdministrativeExpenses',
+    'otherExpenses', 'operatingExpenses', 'costAndExpenses', 'interestIncome',
+    'interestExpense', 'depreciationAndAmortization', 'ebitda', 'ebitdaratio',
+    'operatingIncome', 'operatingIncomeRatio', 'totalOtherIncomeExpensesNet',
+    'incomeBeforeTax', 'incomeBeforeTaxRatio', 'incomeTaxExpense', 'netIncome',
+    'netIncomeRatio', 'eps', 'epsdiluted', 'weightedAverageShsOut',
+    'weightedAverageShsOutDil', 'finalLink']
+
+BALANCE_SHEET_FIELDS = COMMON_FIELDS + [
+    'cashAndCashEquivalents', 'shortTermInvestments', 'cashAndShortTermInvestments',
+    'netReceivables', 'inventory', 'otherCurrentAssets', 'totalCurrentAssets',
+    'propertyPlantEquipmentNet', 'goodwill', 'intangibleAssets',
+    'goodwillAndIntangibleAssets', 'longTermInvestments', 'taxAssets',
+    'otherNonCurrentAssets', 'totalNonCurrentAssets', 'otherAssets', 'totalAssets',
+    'accountPayables', 'shortTermDebt', 'taxPayables', 'deferredRevenue',
+    'otherCurrentLiabilities', 'totalCurrentLiabilities', 'longTermDebt',
+    'deferredRevenueNonCurrent', 'deferredTaxLiabilitiesNonCurrent',
+    'otherNonCurrentLiabilities', 'totalNonCurrentLiabilities', 'otherLiabilities',
+    'capitalLeaseObligations', 'totalLiabilities', 'preferredStock', 'commonStock',
+    'retainedEarnings', 'accumulatedOtherComprehensiveIncomeLoss',
+    'othertotalStockholdersEquity', 'totalStockholdersEquity', 'totalEquity',
+    'totalLiabilitiesAndStockholdersEquity', 'minorityInterest',
+    'totalLiabilitiesAndTotalEquity', 'totalInvestments', 'totalDebt', 'netDebt',
+    'finalLink']
+
+CASH_FLOW_STATEMENT_FIELDS = COMMON_FIELDS + [
+    'netIncome', 'depreciationAndAmortization', 'deferredIncomeTax',
+    'stockBasedCompensation', 'changeInWorkingCapital', 'accountsReceivables',
+    'inventory', 'accountsPayables', 'otherWorkingCapital', 'otherNonCashItems',
+    'netCashProvidedByOperatingActivities', 'investmentsInPropertyPlantAndEquipment',
+    'acquisitionsNet', 'purchasesOfInvestments', 'salesMaturitiesOfInvestments',
+    'otherInvestingActivites', 'netCashUsedForInvestingActivites', 'debtRepayment',
+    'commonStockIssued', 'commonStockRepurchased', 'dividendsPaid',
+    'otherFinancingActivites', 'netCashUsedProvidedByFinancingActivites',
+    'effectOfForexChangesOnCash', 'netChangeInCash', 'cashAtEndOfPeriod',
+    'cashAtBeginningOfPeriod', 'operatingCashFlow', 'capitalExpenditure',
+    'freeCashFlow', 'finalLink']
+
+# 티커 리스트에서 각 행에 덧붙이는 컬럼
+TICKER_INFO_FIELDS = ['Company Name', 'Market Cap', 'Country', 'Sector', 'Industry']
+
+def output_columns(fields):
+    """CSV 헤더: 재무제표 필드 + is_recent_quarter + 티커 정보 (기존 DictWriter 헤더와 동일한 순서)"""
+    return fields + ['is_recent_quarter'] + TICKER_INFO_FIELDS
+
+class StatementColumns:
+    """고정 스키마의 필드별 컬럼 버퍼. 응답마다 새로 만들지 않고 재사용합니다."""
+
+    def __init__(self, fields, capacity=80):
+        self.fields = fields
+        self.index = {field: i for i, field in enumerate(fields)}
+        self.capacity = capacity
+        self.columns = [[None] * capacity for _ in fields]
+        self.length = 0
+
+    def reset(self):
+        for column in self.columns:
+            for i in range(self.length):
+                column[i] = None
+        self.length = 0
+
+    def _grow(self):
+        for column in self.columns:
+            column.extend([None] * self.capacity)
+        self.capacity *= 2
+
+    def decode(self, raw):
+        """응답 bytes를 컬럼 버퍼로 파싱해 행 수를 반환합니다. 리스트가 아닌 응답은 데이터가 없는 것과 구분되도록
+        ValueError를 냅니다 (FMP 에러 객체는 fmp_client에서 먼저 FMPRequestError가 됩니다).
+        응답 dict는 파싱 직후 고정 스키마 컬럼으로 옮기고 버립니다 (응답에 없는 필드는 None)."""
+        self.reset()
+        parsed = json.loads(raw)
+        if not isinstance(parsed, list) or not all(isinstance(statement, dict) for statement in parsed):
+            raise ValueError("Unexpected response: expected a list of statements")
+        while len(parsed) > self.capacity:
+            self._grow()
+        for column, field in zip(self.columns, self.fields):
+            for row, statement in enumerate(parsed):
+                column[row] = statement.get(field)
+        self.length = len(parsed)
+        return self.length
+
+    def sorted_order(self):
+        """ISO 날짜 문자열 그대로 비교해 최신 분기가 먼저 오도록 행 순서를 반환합니다."""
+        dates = self.columns[self.index['date']]
+        return sorted(range(self.length), key=lambda i: dates[i] or '', reverse=True)
+
+    def iter_rows(self, ticker_info):
+        """정렬된 순서로 CSV 행(list)을 생성합니다."""
+        extra = [ticker_info.get(field, '') for field in TICKER_INFO_FIELDS]
+        columns = self.columns
+        for rank, i in enumerate(self.sorted_order()):
+            yield [column[i] for column in columns] + [rank == 0] + extra
+
+class StatementWriter:
+    """파일을 한 번만 열고 여러 티커의 행을 모아 배치로 기록합니다."""
+
+    def __init__(self, file_path, fields, batch_size=5000):
+        self.file = open(file_path, 'w', newline='')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(output_columns(fields))
+        self.batch_size = batch_size
+        self.buffer = []
+
+    def add(self, rows):
+        self.buffer.extend(rows)
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            self.writer.writerows(self.buffer)
+            self.buffer = []
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+import csv
+import glob
+import json
+import os
+import shutil
+from datetime import datetime
+from functools import lru_cache
+
+# 티커 유니버스 관리
+#   ticker-list.csv                  현재 유니버스 (fetch-ticker-list.py가 내려받음)
+#   ticker-list.previous.csv         마지막으로 수집과 병합까지 끝난 유니버스
+#   ticker-universe-changes.json     그 이후 추가/삭제/이름 변경된 심볼 (아직 반영되지 않은 변경)과
+#                                    마지막 반영 때 받지 못한 티커(failed)
+#   ticker-universe-failed.*.json    이번 실행에서 수집 스크립트별로 받지 못한 티커
+# 변경 내역은 병합이 성공해 commit_universe()가 호출될 때까지 유지되므로, 목록을 여러 번 내려받거나
+# 수집/병합이 실패해도 다음 실행에서 다시 반영됩니다. 받지 못한 티커는 추가된 티커든 기존 티커든
+# 다음 증분 실행에서 다시 받습니다.
+# 모든 수집 스크립트는 이 모듈로 정규화된 티커 테이블을 읽습니다.
+
+def normalize_ticker(ticker):
+    """FMP 형식으로 티커를 정규화합니다 (예: BRK/B -> BRK.B)."""
+    return ticker.strip().replace('/', '.')
+
+def normalize_company_name(name):
+    return (name or '').replace(' Common Stock', '').strip().lower()
+
+def previous_path(file_path):
+    base, ext = os.path.splitext(file_path)
+    return f"{base}.previous{ext}"
+
+def changes_path(file_path):
+    return os.path.join(os.path.dirname(os.path.abspath(file_path)), 'ticker-universe-changes.json')
+
+def failures_path(file_path, source):
+    return os.path.join(os.path.dirname(os.path.abspath(file_path)), f'ticker-universe-failed.{source}.json')
+
+@lru_cache(maxsize=8)
+def _load_table(file_path, mtime):
+    with open(file_path, 'r') as csvfile:
+        rows = []
+        for row in csv.DictReader(csvfile):
+            if not row.get('Ticker'):
+                continue
+            row['Ticker'] = normalize_ticker(row['Ticker'])
+            rows.append(row)
+    return tuple(rows)
+
+def load_ticker_table(file_path):
+    """정규화된 티커 테이블(행 dict의 튜플)을 반환합니다. 파일이 바뀌지 않으면 캐시된 결과를 재사용합니다.
+    반환된 행은 여러 호출자가 공유하므로 수정하지 마세요."""
+    file_path = os.path.abspath(file_path)
+    return _load_table(file_path, os.path.getmtime(file_path))
+
+def load_tickers(file_path):
+    return [row['Ticker'] for row in load_ticker_table(file_path)]
+
+def diff_universe(old_rows, new_rows):
+    """추가/삭제/이름 변경된 심볼을 계산합니다. 같은 회사명으로 삭제와 추가가 짝지어지면 이름 변경으로 봅니다."""
+    old = {row['Ticker']: row for row in old_rows}
+    new = {row['Ticker']: row for row in new_rows}
+    added = [t for t in new if t not in old]
+    removed = [t for t in old if t not in new]
+
+    removed_by_name = {}
+    for ticker in removed:
+        name = normalize_company_name(old[ticker].get('Company Name'))
+        if name:
+            removed_by_name.setdefault(name, []).append(ticker)
+
+    renamed = {}
+    for ticker in added:
+        candidates = removed_by_name.get(normalize_company_name(new[ticker].get('Company Name')))
+        if candidates:
+            renamed[candidates.pop(0)] = ticker
+
+    return {
+        'added': sorted(t for t in added if t not in renamed.values()),
+        'removed': sorted(t for t in removed if t not in renamed),
+        'renamed': dict(sorted(renamed.items())),
+    }
+
+def write_json(path, data):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+def refresh_universe(file_path, failed=None):
+    """ticker-list.csv를 마지막으로 반영된 유니버스와 비교해 아직 반영되지 않은 변경 내역을 기록합니다.
+    기준 유니버스는 바꾸지 않으므로 여러 번 호출해도 변경 내역이 사라지지 않습니다.
+    failed를 주지 않으면 기록된 받지 못한 티커를 유지합니다 (유니버스에서 빠진 티커는 제외)."""
+    new_rows = load_ticker_table(file_path)
+    old_file = previous_path(file_path)
+    old_rows = load_ticker_table(old_file) if os.path.exists(old_file) else ()
+    if failed is None:
+        failed = load_changes(file_path).get('failed', [])
+
+    changes = diff_universe(old_rows, new_rows)
+    changes['failed'] = sorted(set(failed) & {row['Ticker'] for row in new_rows})
+    changes['generated_at'] = datetime.now().isoformat(timespec='seconds')
+    changes['initial'] = not old_rows
+    write_json(changes_path(file_path), changes)
+
+    print(f"Universe: {len(new_rows)} tickers, {len(changes['added'])} added, "
+          f"{len(changes['removed'])} removed, {len(changes['renamed'])} renamed, "
+          f"{len(changes['failed'])} failed last run")
+    return changes
+
+def record_failures(file_path, source, tickers):
+    """수집 스크립트(source)가 받지 못한 티커를 기록합니다. 수집 스크립트는 병렬로 돌기 때문에 파일을 따로 씁니다."""
+    write_json(failures_path(file_path, source), sorted(tickers))
+
+def load_failures(file_path):
+    failed = set()
+    pattern = failures_path(file_path, '*')
+    for path in glob.glob(pattern):
+        with open(path, 'r') as f:
+            failed.update(json.load(f))
+    return failed
+
+def commit_universe(file_path):
+    """수집과 병합이 끝난 뒤 호출합니다. 현재 유니버스를 기준 유니버스로 삼고, 이번 실행에서 받지 못한 티커는
+    변경 내역의 failed로 남겨 다음 증분 실행에서 다시 받도록 합니다."""
+    failed = load_failures(file_path)
+    old_file = previous_path(file_path)
+    tmp_path = f"{old_file}.{os.getpid()}.tmp"
+    shutil.copyfile(file_path, tmp_path)
+    os.replace(tmp_path, old_file)
+    for path in glob.glob(failures_path(file_path, '*')):
+        os.remove(path)
+
+    changes = refresh_universe(file_path, failed)
+    if changes['failed']:
+        print(f"Universe committed; {len(changes['failed'])} tickers will be fetched again: "
+              f"{', '.join(changes['failed'])}")
+    return changes
+
+def load_changes(file_path):
+    path = changes_path(file_path)
+    if not os.path.exists(path):
+        return {'added': [], 'removed': [], 'renamed': {}, 'failed': [], 'initial': True}
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def tickers_to_backfill(file_path):
+    """증분 실행에서 새로 받아야 할 티커 (추가된 티커 + 이름이 바뀐 티커의 새 이름 + 지난번에 받지 못한 티커)."""
+    changes = load_changes(file_path)
+    return set(changes['added']) | set(changes['renamed'].values()) | set(changes.get('failed', []))
@@ -1,10 +1,13 @@
 #!/usr/bin/env python3
 import sys
 import os
-from google.cloud import storage
+from profiling import run_main
 
 def upload_blob(bucket_name, source_file_name, destination_blob_name):
     """Uploads a file to the bucket."""
+    # Imported lazily so the client library is only loaded when an upload actually happens
+    from google.cloud import storage
+
     storage_client = storage.Client()
     bucket = storage_client.bucket(bucket_name)
     blob = bucket.blob(destination_blob_name)
@@ -35,4 +38,4 @@ def main():
     upload_blob(bucket_name, source_file_name, destination_blob_name)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    run_main('upload-FS-to-GCS', main)
\ No newline at end of file